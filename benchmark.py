@@ -0,0 +1,77 @@
+import copy
+import os
+import pickle
+import tempfile
+from time import perf_counter
+
+import numpy as np
+
+from columnar_file import ColumnarFile, LazyRecords, write_columns
+from pokemon import Abilities, Moves, Pokemon, Pokemons, Types
+
+
+def random_teams(number_of_teams, number_of_types, seed=0):
+    """Random teams of 6 pokemons with a primary type and a secondary type or an empty slot"""
+    generator = np.random.default_rng(seed)
+    teams = generator.integers(0, number_of_types, size=(number_of_teams, 12), dtype=np.int16)
+    teams[:, 1::2][generator.random((number_of_teams, 6)) < 0.5] = -1
+    return teams
+
+
+def benchmark_teams(sizes=(1000, 100000, 1000000), processes=os.cpu_count()):
+    number_of_types = len(Types.get_type_names())
+    for size in sizes:
+        teams = random_teams(size, number_of_types)
+        for pool in (None, processes):
+            start = perf_counter()
+            Types.calculate_teams(teams, processes=pool, chunk_size=-(-size // (pool or 1)))
+            elapsed = perf_counter() - start
+            print(f"{size:>9} teams, {pool or 1:>2} process(es): {elapsed:.3f} s, {size / elapsed:,.0f} teams/s")
+
+
+def copy_pokemon(pokemon):
+    copied = copy.copy(pokemon)
+    copied.__dict__.update({name: list(value) for name, value in vars(pokemon).items() if isinstance(value, list)})
+    return copied
+
+
+def benchmark_stores(scales=(1, 100)):
+    """Compares loading pokemons from a pickle with opening them from a columnar file. Loaded pokemons are repeated
+    scale times. Every column the indexes are built from is read in both cases"""
+    columns = ["name", "dex_number", "order", "generation", "types", "stats", "height", "weight", "description"]
+    pokemons = Pokemons.get_filtered_pokemons()
+    resolvers = {"types": Types.get_type, "moves": Moves.find_move, "abilities": Abilities.find_ability}
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in scales:
+            # every copy is a separate object sharing types, moves and abilities with the loaded pokemons
+            objects = [copy_pokemon(pokemon) for _ in range(scale) for pokemon in pokemons]
+            pickle_path = os.path.join(directory, f"pokemons{scale}.pickle")
+            columns_path = os.path.join(directory, f"pokemons{scale}.columns")
+            with open(pickle_path, "wb") as file:
+                pickle.dump(objects, file)
+            write_columns(columns_path, objects, Pokemon.schema)
+
+            start = perf_counter()
+            with open(pickle_path, "rb") as file:
+                records = LazyRecords(Pokemon, pickle.load(file))
+            for column in columns:
+                records.column(column)
+            pickled = perf_counter() - start
+
+            start = perf_counter()
+            records = LazyRecords(Pokemon, store=ColumnarFile(columns_path, resolvers))
+            for column in columns:
+                records.column(column)
+            columnar = perf_counter() - start
+            records.detach()
+            print(f"{len(objects):>9} pokemons: pickle {pickled:.3f} s ({os.path.getsize(pickle_path):,} bytes), "
+                  f"columns {columnar:.3f} s ({os.path.getsize(columns_path):,} bytes)")
+
+
+if __name__ == "__main__":
+    Types.prepare_types()
+    benchmark_teams()
+    Abilities.prepare_abilities()
+    Moves.prepare_moves()
+    Pokemons.prepare_pokemons()
+    benchmark_stores()
@@ -0,0 +1,269 @@
+import json
+import mmap
+import os
+from collections.abc import MutableSequence
+
+import numpy as np
+
+# File starts with the magic line, then 8 bytes with the length of json header describing where every block of every
+# column starts. Blocks are numpy arrays aligned to 8 bytes:
+#   int    - values (int64)
+#   bool   - values (uint8)
+#   str    - offsets (int64, rows + 1) into heap (utf-8 bytes)
+#   json   - like str, values are encoded as json
+#   ref    - values (int32) indexes into the table of names of referred objects
+#   refs   - offsets (int64, rows + 1) into values (int32) indexes into the table of names
+#   flagged refs - like refs with flags (uint8) for every value
+#   pairs  - like refs where table holds names of keys, numbers (int64) hold the second element of every pair
+# Every column has nulls (uint8) block marking rows whose value is None
+magic = b"PEPEDEX COLUMNS 1\n"
+
+
+def is_columnar_file(file_path):
+    try:
+        with open(file_path, "rb") as file:
+            return file.read(len(magic)) == magic
+    except OSError:
+        return False
+
+
+def heap_blocks(strings):
+    encoded = [string.encode() for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(string) for string in encoded])
+    return {"offsets": offsets, "heap": np.frombuffer(b"".join(encoded), dtype=np.uint8)}
+
+
+def list_offsets(lists):
+    offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(values) for values in lists])
+    return offsets
+
+
+def column_blocks(kind, values):
+    """Returns (blocks, table of names) of a column"""
+    if kind == "int":
+        return {"values": np.array([value if value is not None else 0 for value in values], dtype=np.int64)}, None
+    if kind == "bool":
+        return {"values": np.array([bool(value) for value in values], dtype=np.uint8)}, None
+    if kind == "str":
+        return heap_blocks([value if value is not None else "" for value in values]), None
+    if kind == "json":
+        return heap_blocks([json.dumps(value) for value in values]), None
+
+    table = {}
+    if kind == "ref":
+        indexes = [table.setdefault(value.name, len(table)) if value is not None else 0 for value in values]
+        return {"values": np.array(indexes, dtype=np.int32)}, list(table)
+    values = [value if value is not None else [] for value in values]
+    if kind == "refs":
+        indexes = [table.setdefault(obj.name, len(table)) for objects in values for obj in objects]
+        return {"offsets": list_offsets(values), "values": np.array(indexes, dtype=np.int32)}, list(table)
+    if kind == "flagged refs":
+        indexes = [table.setdefault(obj.name, len(table)) for pairs in values for obj, _ in pairs]
+        flags = [bool(flag) for pairs in values for _, flag in pairs]
+        return {"offsets": list_offsets(values), "values": np.array(indexes, dtype=np.int32),
+                "flags": np.array(flags, dtype=np.uint8)}, list(table)
+    if kind == "pairs":
+        indexes = [table.setdefault(key, len(table)) for pairs in values for key, _ in pairs]
+        numbers = [number for pairs in values for _, number in pairs]
+        return {"offsets": list_offsets(values), "values": np.array(indexes, dtype=np.int32),
+                "numbers": np.array(numbers, dtype=np.int64)}, list(table)
+    raise ValueError(f"Unknown kind of column {kind}")
+
+
+def write_columns(file_path, objects, schema):
+    """Saves attributes of objects column by column. Schema is list of (column, kind, attribute name)"""
+    header = {"rows": len(objects), "columns": {}}
+    blocks = []
+    position = 0
+    for column, kind, attribute in schema:
+        values = [getattr(obj, attribute) for obj in objects]
+        blocks_of_column, table = column_blocks(kind, values)
+        blocks_of_column["nulls"] = np.array([value is None for value in values], dtype=np.uint8)
+        header["columns"][column] = {"kind": kind, "table": table, "blocks": {}}
+        for name, array in blocks_of_column.items():
+            header["columns"][column]["blocks"][name] = [position, array.dtype.str, len(array)]
+            blocks.append(array)
+            position += -(-array.nbytes // 8) * 8
+
+    encoded_header = json.dumps(header).encode()
+    start = -(-(len(magic) + 8 + len(encoded_header)) // 8) * 8
+    # file is renamed into place so that a crash never leaves a half written store
+    with open(file_path + ".tmp", "wb") as file:
+        file.write(magic)
+        file.write(len(encoded_header).to_bytes(8, "little"))
+        file.write(encoded_header)
+        file.write(b"\0" * (start - file.tell()))
+        for array in blocks:
+            data = array.tobytes()
+            file.write(data)
+            file.write(b"\0" * (-(-len(data) // 8) * 8 - len(data)))
+    os.replace(file_path + ".tmp", file_path)
+
+
+class ColumnarFile:
+    """Store written by write_columns opened with mmap. Columns are read straight from the mapped file and nothing is
+    decoded before it is asked for. Resolvers ({column: function(name) -> object}) turn names from tables of
+    reference columns into loaded objects"""
+
+    def __init__(self, file_path, resolvers=None):
+        with open(file_path, "rb") as file:
+            self.__map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        header_length = int.from_bytes(self.__map[len(magic):len(magic) + 8], "little")
+        header = json.loads(self.__map[len(magic) + 8:len(magic) + 8 + header_length])
+        start = -(-(len(magic) + 8 + header_length) // 8) * 8
+        self.__rows = header["rows"]
+        self.__columns = {}
+        for column, description in header["columns"].items():
+            blocks = {name: np.frombuffer(self.__map, dtype=np.dtype(dtype), count=count, offset=start + offset)
+                      for name, (offset, dtype, count) in description["blocks"].items()}
+            self.__columns[column] = (description["kind"], description["table"], blocks)
+        self.__resolvers = resolvers or {}
+        self.__resolved = {}  # column -> objects from its table
+
+    def __len__(self):
+        return self.__rows
+
+    def columns(self):
+        return list(self.__columns)
+
+    def close(self):
+        # arrays viewing the map have to be gone before it can be closed
+        self.__columns = {}
+        self.__resolved = {}
+        try:
+            self.__map.close()
+        except BufferError:
+            pass
+
+    def __table(self, column):
+        if column not in self.__resolved:
+            _, table, _ = self.__columns[column]
+            resolve = self.__resolvers.get(column, lambda name: name)
+            self.__resolved[column] = [resolve(name) for name in table]
+        return self.__resolved[column]
+
+    def get(self, column, row):
+        kind, _, blocks = self.__columns[column]
+        if blocks["nulls"][row]:
+            return None
+        if kind == "int":
+            return int(blocks["values"][row])
+        if kind == "bool":
+            return bool(blocks["values"][row])
+        if kind in ("str", "json"):
+            text = blocks["heap"][blocks["offsets"][row]:blocks["offsets"][row + 1]].tobytes().decode()
+            return text if kind == "str" else json.loads(text)
+        table = self.__table(column)
+        if kind == "ref":
+            return table[blocks["values"][row]]
+        start, end = blocks["offsets"][row], blocks["offsets"][row + 1]
+        if kind == "refs":
+            return [table[index] for index in blocks["values"][start:end].tolist()]
+        if kind == "flagged refs":
+            return [(table[index], bool(flag)) for index, flag in zip(blocks["values"][start:end].tolist(),
+                                                                      blocks["flags"][start:end].tolist())]
+        return [(table[index], number) for index, number in zip(blocks["values"][start:end].tolist(),
+                                                                blocks["numbers"][start:end].tolist())]
+
+    def column(self, column):
+        """Returns values of the column in every row, decoded all at once"""
+        kind, _, blocks = self.__columns[column]
+        nulls = blocks["nulls"].tolist()
+        if kind in ("int", "bool"):
+            values = blocks["values"].tolist() if kind == "int" else [bool(value) for value in blocks["values"]]
+        elif kind in ("str", "json"):
+            heap = blocks["heap"].tobytes()
+            offsets = blocks["offsets"].tolist()
+            values = [heap[offsets[row]:offsets[row + 1]].decode() for row in range(self.__rows)]
+            if kind == "json":
+                values = [json.loads(value) for value in values]
+        else:
+            table = self.__table(column)
+            indexes = blocks["values"].tolist()
+            if kind == "ref":
+                values = [table[index] for index in indexes]
+            else:
+                if kind == "refs":
+                    items = [table[index] for index in indexes]
+                elif kind == "flagged refs":
+                    items = [(table[index], bool(flag)) for index, flag in zip(indexes, blocks["flags"].tolist())]
+                else:
+                    items = [(table[index], number) for index, number in zip(indexes, blocks["numbers"].tolist())]
+                offsets = blocks["offsets"].tolist()
+                values = [items[offsets[row]:offsets[row + 1]] for row in range(self.__rows)]
+        return [None if null else value for value, null in zip(values, nulls)]
+
+
+class LazyRecords(MutableSequence):
+    """List of objects of which those read from a ColumnarFile are built only when they are accessed. Objects are of
+    the given class which describes its columns in the schema attribute. Values of single columns can be read with
+    value() and column() without building objects. If the class lists detail_columns, objects are built without them
+    and get a function reading them (see Pokemon.attach_details), so details of a row are read only when needed"""
+
+    def __init__(self, cls, objects=(), store=None):
+        self.__cls = cls
+        self.__attributes = {column: attribute for column, _, attribute in cls.schema}
+        self.__details = set(getattr(cls, "detail_columns", []))
+        self.__store = store
+        # rows that weren't built yet are kept as their numbers
+        self.__slots = list(range(len(store))) if store is not None else list(objects)
+
+    def __len__(self):
+        return len(self.__slots)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(len(self.__slots))[index]]
+        slot = self.__slots[index]
+        if isinstance(slot, int):
+            # object is restored without calling __init__ which expects an api response
+            obj = self.__cls.__new__(self.__cls)
+            obj.__dict__.update({attribute: self.__store.get(column, slot)
+                                 for column, attribute in self.__attributes.items() if column not in self.__details})
+            if len(self.__details) > 0:
+                obj.attach_details(self.__details_reader(slot))
+            self.__slots[index] = slot = obj
+        return slot
+
+    def __details_reader(self, row):
+        store = self.__store
+        details = {column: attribute for column, attribute in self.__attributes.items() if column in self.__details}
+        return lambda: {attribute: store.get(column, row) for column, attribute in details.items()}
+
+    def __setitem__(self, index, obj):
+        self.__slots[index] = obj
+
+    def __delitem__(self, index):
+        del self.__slots[index]
+
+    def insert(self, index, obj):
+        self.__slots.insert(index, obj)
+
+    def value(self, position, column):
+        slot = self.__slots[position]
+        if isinstance(slot, int):
+            return self.__store.get(column, slot)
+        if column in self.__details:
+            slot.load_details()
+        return getattr(slot, self.__attributes[column])
+
+    def column(self, column):
+        """Returns values of the column for every object in the list"""
+        if self.__store is None:
+            return [self.value(position, column) for position in range(len(self.__slots))]
+        values = self.__store.column(column)
+        return [values[slot] if isinstance(slot, int) else self.value(position, column)
+                for position, slot in enumerate(self.__slots)]
+
+    def detach(self):
+        """Builds every object with its details and closes the file so that it can be written again"""
+        for position in range(len(self.__slots)):
+            if len(self.__details) > 0:
+                self[position].load_details()
+            else:
+                self[position]
+        if self.__store is not None:
+            self.__store.close()
+            self.__store = None
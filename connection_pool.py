@@ -0,0 +1,139 @@
+import threading
+from importlib.util import find_spec
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class ConnectionPool:
+    """Shared HTTP layer used by every network call in PepeDex. Connections are kept alive and reused by following
+    requests to the same host instead of doing a new TCP and TLS handshake every time"""
+
+    __default_pool_size = 10
+    __pool_sizes = {}  # host name -> number of connections kept alive for that host
+    __timeout = 30
+    __http2 = False
+    __session = None
+    __session_lock = threading.Lock()
+    __statistics_lock = threading.Lock()
+    __requests_sent = 0
+    __connections_opened = 0  # only counted directly for http/2, http/1.1 pools keep their own counters
+
+    @classmethod
+    def set_pool_size(cls, host, size):
+        """Sets how many keep-alive connections can be open to the given host at the same time"""
+        if size < 1:
+            raise ValueError("Pool size has to be a positive number")
+        cls.__session_lock.acquire()
+        if cls.__pool_sizes.get(host) != size:
+            cls.__pool_sizes[host] = size
+            cls.__reset_session()
+        cls.__session_lock.release()
+
+    @classmethod
+    def enable_http2(cls, enabled=True):
+        """Switches the pool to HTTP/2. Requires optional httpx package with http2 extra, otherwise HTTP/1.1 with
+        keep-alive stays in use"""
+        if enabled and (find_spec("httpx") is None or find_spec("h2") is None):
+            print("HTTP/2 needs 'httpx[http2]' package. Staying with HTTP/1.1")
+            return False
+        cls.__session_lock.acquire()
+        if cls.__http2 != enabled:
+            cls.__http2 = enabled
+            cls.__reset_session()
+        cls.__session_lock.release()
+        return enabled
+
+    @classmethod
+    def __reset_session(cls):
+        # has to be called with the session lock acquired
+        if cls.__session is not None:
+            cls.__session.close()
+        cls.__session = None
+        cls.__requests_sent = 0
+        cls.__connections_opened = 0
+
+    @classmethod
+    def __create_session(cls):
+        if cls.__http2:
+            import httpx
+            mounts = {}
+            for host, size in cls.__pool_sizes.items():
+                limits = httpx.Limits(max_connections=size, max_keepalive_connections=size)
+                mounts[f"all://{host}"] = httpx.HTTPTransport(http2=True, limits=limits)
+            limits = httpx.Limits(max_connections=cls.__default_pool_size,
+                                  max_keepalive_connections=cls.__default_pool_size)
+            return httpx.Client(http2=True, limits=limits, mounts=mounts, timeout=cls.__timeout)
+
+        session = requests.Session()
+        for host, size in cls.__pool_sizes.items():
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+            session.mount(f"https://{host}/", adapter)
+            session.mount(f"http://{host}/", adapter)
+        adapter = HTTPAdapter(pool_connections=cls.__default_pool_size, pool_maxsize=cls.__default_pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @classmethod
+    def __get_session(cls):
+        cls.__session_lock.acquire()
+        if cls.__session is None:
+            cls.__session = cls.__create_session()
+        session = cls.__session
+        cls.__session_lock.release()
+        return session
+
+    @classmethod
+    def __trace(cls, event, info):
+        if event == "connection.connect_tcp.complete":
+            cls.__statistics_lock.acquire()
+            cls.__connections_opened += 1
+            cls.__statistics_lock.release()
+
+    @classmethod
+    def get(cls, url, headers=None):
+        """Sends GET request through a pooled connection. Returned response has status_code, headers, content and
+        json() no matter which HTTP version is used"""
+        session = cls.__get_session()
+        cls.__statistics_lock.acquire()
+        cls.__requests_sent += 1
+        cls.__statistics_lock.release()
+
+        if not cls.__http2:
+            return session.get(url, headers=headers, timeout=cls.__timeout)
+
+        import httpx
+        try:
+            return session.get(url, headers=headers, extensions={"trace": cls.__trace})
+        except httpx.HTTPError as e:
+            # the rest of the program only knows about exceptions raised by requests
+            raise requests.exceptions.ConnectionError(str(e))
+
+    @classmethod
+    def get_statistics(cls):
+        """Returns tuple (connections reused, connections newly opened) since the pool was created"""
+        session = cls.__get_session()
+        if cls.__http2:
+            opened = cls.__connections_opened
+            return cls.__requests_sent - opened, opened
+
+        opened = 0
+        sent = 0
+        for adapter in set(session.adapters.values()):
+            for pool_key in adapter.poolmanager.pools.keys():
+                pool = adapter.poolmanager.pools.get(pool_key)
+                if pool is not None:
+                    opened += pool.num_connections
+                    sent += pool.num_requests
+        return sent - opened, opened
+
+    @classmethod
+    def print_statistics(cls):
+        reused, opened = cls.get_statistics()
+        print(f"Connections: {opened} opened, {reused} reused")
+
+    @classmethod
+    def close(cls):
+        cls.__session_lock.acquire()
+        cls.__reset_session()
+        cls.__session_lock.release()
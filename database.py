@@ -0,0 +1,290 @@
+import json
+import os
+import sqlite3
+
+from Levenshtein import distance
+
+
+class Database:
+    """Optional SQLite copy of the saved stores. While it is open registries answer get_* calls with queries instead
+    of loaded lists, so a short script can look up a few pokemons without preparing every store. Database is kept in
+    WAL mode, so it can be read by many processes while it is being saved"""
+
+    __directory = "SavedData"
+    __file_name = "pokedex.db"
+    __connection = None
+    __objects = {}  # (table, position) -> object built from the row, so that every row becomes one object
+    __max_distance = 4  # names less than that many edits away from the searched one are found, as in NameIndex
+    # pokemon attribute -> column with its value
+    __stat_columns = {"hp": "hp", "attack": "attack", "defense": "defense", "special-attack": "special_attack",
+                      "special-defense": "special_defense", "speed": "speed"}
+    __relations = ["double_from", "double_to", "half_from", "half_to", "no_from", "no_to"]
+    # position is the place of an object in the saved list, ids are the ones given by the api
+    __schema = """
+        CREATE TABLE IF NOT EXISTS type (position INTEGER PRIMARY KEY, id INTEGER, name TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS damage_relation (type INTEGER NOT NULL REFERENCES type, relation TEXT NOT NULL,
+            target INTEGER NOT NULL REFERENCES type);
+        CREATE TABLE IF NOT EXISTS ability (position INTEGER PRIMARY KEY, id INTEGER, name TEXT NOT NULL,
+            description TEXT);
+        CREATE TABLE IF NOT EXISTS move (position INTEGER PRIMARY KEY, id INTEGER, name TEXT NOT NULL, accuracy,
+            move_class TEXT, description TEXT, effect_chance, power, pp, priority INTEGER,
+            type INTEGER REFERENCES type);
+        CREATE TABLE IF NOT EXISTS pokemon (position INTEGER PRIMARY KEY, id INTEGER, name TEXT NOT NULL,
+            dex_number INTEGER, description TEXT, legendary INTEGER, mythical INTEGER, generation TEXT, height INTEGER,
+            weight INTEGER, sprites TEXT, genera TEXT, primary_type INTEGER REFERENCES type,
+            secondary_type INTEGER REFERENCES type, hp INTEGER, attack INTEGER, defense INTEGER,
+            special_attack INTEGER, special_defense INTEGER, speed INTEGER, total INTEGER);
+        CREATE TABLE IF NOT EXISTS learnset (pokemon INTEGER NOT NULL REFERENCES pokemon, slot INTEGER NOT NULL,
+            move INTEGER NOT NULL REFERENCES move, PRIMARY KEY (pokemon, slot)) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS pokemon_ability (pokemon INTEGER NOT NULL REFERENCES pokemon,
+            slot INTEGER NOT NULL, ability INTEGER NOT NULL REFERENCES ability, hidden INTEGER NOT NULL,
+            PRIMARY KEY (pokemon, slot)) WITHOUT ROWID;
+
+        CREATE INDEX IF NOT EXISTS type_name ON type (name);
+        CREATE INDEX IF NOT EXISTS type_id ON type (id);
+        CREATE INDEX IF NOT EXISTS damage_relation_type ON damage_relation (type);
+        CREATE INDEX IF NOT EXISTS ability_name ON ability (name);
+        CREATE INDEX IF NOT EXISTS ability_id ON ability (id);
+        CREATE INDEX IF NOT EXISTS move_name ON move (name);
+        CREATE INDEX IF NOT EXISTS move_id ON move (id);
+        CREATE INDEX IF NOT EXISTS move_type ON move (type);
+        CREATE INDEX IF NOT EXISTS pokemon_name ON pokemon (name);
+        CREATE INDEX IF NOT EXISTS pokemon_id ON pokemon (id);
+        CREATE INDEX IF NOT EXISTS pokemon_dex_number ON pokemon (dex_number, id);
+        CREATE INDEX IF NOT EXISTS pokemon_primary_type ON pokemon (primary_type, dex_number);
+        CREATE INDEX IF NOT EXISTS pokemon_secondary_type ON pokemon (secondary_type, dex_number);
+        CREATE INDEX IF NOT EXISTS pokemon_generation ON pokemon (generation, dex_number);
+        CREATE INDEX IF NOT EXISTS pokemon_hp ON pokemon (hp);
+        CREATE INDEX IF NOT EXISTS pokemon_attack ON pokemon (attack);
+        CREATE INDEX IF NOT EXISTS pokemon_defense ON pokemon (defense);
+        CREATE INDEX IF NOT EXISTS pokemon_special_attack ON pokemon (special_attack);
+        CREATE INDEX IF NOT EXISTS pokemon_special_defense ON pokemon (special_defense);
+        CREATE INDEX IF NOT EXISTS pokemon_speed ON pokemon (speed);
+        CREATE INDEX IF NOT EXISTS pokemon_total ON pokemon (total);
+        CREATE INDEX IF NOT EXISTS learnset_move ON learnset (move, pokemon);
+        CREATE INDEX IF NOT EXISTS pokemon_ability_ability ON pokemon_ability (ability, pokemon);
+    """
+
+    @classmethod
+    def __file_path(cls):
+        return os.path.abspath(cls.__directory) + f"\\{cls.__file_name}"
+
+    @classmethod
+    def exists(cls):
+        return os.path.exists(cls.__file_path())
+
+    @classmethod
+    def __connect(cls):
+        try:
+            file_path = os.path.abspath(cls.__directory)
+            if not os.path.exists(file_path):
+                os.mkdir(file_path)
+        except OSError:
+            raise
+        connection = sqlite3.connect(cls.__file_path())
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.create_function("matches_name", 2, lambda name, text: text in name.lower() or
+                                   distance(name.lower(), text) < cls.__max_distance, deterministic=True)
+        connection.executescript(cls.__schema)
+        return connection
+
+    @classmethod
+    def open(cls):
+        """Makes registries read from the database. Meant for programs that don't prepare the stores"""
+        if cls.__connection is None:
+            cls.__connection = cls.__connect()
+            cls.__objects = {}
+
+    @classmethod
+    def close(cls):
+        """Makes registries use loaded stores again"""
+        if cls.__connection is not None:
+            cls.__connection.close()
+            cls.__connection = None
+            cls.__objects = {}
+
+    @classmethod
+    def is_open(cls):
+        return cls.__connection is not None
+
+    @classmethod
+    def save(cls, types, abilities, moves, pokemons):
+        """Replaces content of the database with given objects in a single transaction, so readers see either the old
+        or the new data"""
+        connection = cls.__connection if cls.__connection is not None else cls.__connect()
+        # objects are referred to by the position of the first object with their name
+        positions = {}
+        for table, objects in (("type", types), ("ability", abilities), ("move", moves)):
+            positions[table] = {}
+            for position, obj in enumerate(objects):
+                positions[table].setdefault(obj.name, position)
+        type_positions = positions["type"]
+        try:
+            with connection:
+                for table in ("learnset", "pokemon_ability", "damage_relation", "pokemon", "move", "ability", "type"):
+                    connection.execute(f"DELETE FROM {table}")
+                connection.executemany("INSERT INTO type VALUES (?, ?, ?)",
+                                       [(position, typ.id, typ.name) for position, typ in enumerate(types)])
+                connection.executemany("INSERT INTO damage_relation VALUES (?, ?, ?)",
+                                       [(position, relation, type_positions[target])
+                                        for position, typ in enumerate(types) for relation in cls.__relations
+                                        for target in getattr(typ, relation) if target in type_positions])
+                connection.executemany("INSERT INTO ability VALUES (?, ?, ?, ?)",
+                                       [(position, ability.id, ability.name, ability.description)
+                                        for position, ability in enumerate(abilities)])
+                connection.executemany("INSERT INTO move VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                       [(position, move.id, move.name, move.accuracy, move.move_class,
+                                         move.description, move.effect_chance, move.power, move.pp, move.priority,
+                                         type_positions.get(move.type))
+                                        for position, move in enumerate(moves)])
+                connection.executemany(f"INSERT INTO pokemon VALUES ({', '.join(['?'] * 21)})",
+                                       [cls.__pokemon_row(position, pokemon, type_positions)
+                                        for position, pokemon in enumerate(pokemons)])
+                connection.executemany("INSERT INTO learnset VALUES (?, ?, ?)",
+                                       [(position, slot, positions["move"][move.name])
+                                        for position, pokemon in enumerate(pokemons)
+                                        for slot, move in enumerate(pokemon.moves)])
+                connection.executemany("INSERT INTO pokemon_ability VALUES (?, ?, ?, ?)",
+                                       [(position, slot, positions["ability"][ability.name], hidden)
+                                        for position, pokemon in enumerate(pokemons)
+                                        for slot, (ability, hidden) in enumerate(pokemon.abilities)])
+            cls.__objects = {}
+        finally:
+            if connection is not cls.__connection:
+                connection.close()
+
+    @classmethod
+    def __pokemon_row(cls, position, pokemon, type_positions):
+        types = [type_positions.get(typ.name) for typ in pokemon.types] + [None, None]
+        stats = dict(pokemon.stats)
+        stat_values = [stats.get(stat) for stat in cls.__stat_columns]
+        total = sum(value for value in stat_values if value is not None)
+        return (position, pokemon.id, pokemon.name, pokemon.dex_number, pokemon.description, pokemon.legendary,
+                pokemon.mythical, pokemon.generation, pokemon.height, pokemon.weight, json.dumps(pokemon.sprites),
+                pokemon.genera, types[0], types[1], *stat_values, total)
+
+    @classmethod
+    def get_object(cls, table, row, build):
+        """Returns object built from the row by build(row) the first time the row was asked for"""
+        key = (table, row["position"])
+        if key not in cls.__objects:
+            cls.__objects[key] = build(row)
+        return cls.__objects[key]
+
+    @classmethod
+    def get_row(cls, table, column, value):
+        """Returns the first row of the table with the given value in the column. Raises KeyError if there is none"""
+        row = cls.__connection.execute(f"SELECT * FROM {table} WHERE {column} = ? ORDER BY position LIMIT 1",
+                                       (value,)).fetchone()
+        if row is None:
+            raise KeyError(value)
+        return row
+
+    @classmethod
+    def get_rows(cls, table):
+        return cls.__connection.execute(f"SELECT * FROM {table} ORDER BY position").fetchall()
+
+    @classmethod
+    def get_damage_relations(cls, type_position):
+        """Returns dictionary {relation: names of types} of the type"""
+        relations = {relation: [] for relation in cls.__relations}
+        for relation, name in cls.__connection.execute(
+                "SELECT relation, type.name FROM damage_relation JOIN type ON type.position = target "
+                "WHERE damage_relation.type = ? ORDER BY damage_relation.rowid", (type_position,)):
+            relations[relation].append(name)
+        return relations
+
+    @classmethod
+    def get_pokemon_types(cls, pokemon_row):
+        return [cls.get_row("type", "position", position)
+                for position in (pokemon_row["primary_type"], pokemon_row["secondary_type"]) if position is not None]
+
+    @classmethod
+    def get_stats(cls, pokemon_row):
+        """Returns stats of the pokemon as list of (name, value) like Pokemon.stats"""
+        return [(stat, pokemon_row[column]) for stat, column in cls.__stat_columns.items()
+                if pokemon_row[column] is not None]
+
+    @classmethod
+    def get_learnset(cls, pokemon_position):
+        """Returns rows of moves learnt by the pokemon"""
+        return cls.__connection.execute("SELECT move.* FROM learnset JOIN move ON move.position = learnset.move "
+                                        "WHERE pokemon = ? ORDER BY slot", (pokemon_position,)).fetchall()
+
+    @classmethod
+    def get_pokemon_abilities(cls, pokemon_position):
+        """Returns rows of abilities of the pokemon with a column telling whether the ability is hidden"""
+        return cls.__connection.execute("SELECT ability.*, hidden FROM pokemon_ability JOIN ability ON "
+                                        "ability.position = pokemon_ability.ability WHERE pokemon = ? ORDER BY slot",
+                                        (pokemon_position,)).fetchall()
+
+    @classmethod
+    def get_learners(cls, move_name):
+        """Returns rows of pokemons that learn the move sorted by dex number"""
+        return cls.__connection.execute(
+            "SELECT * FROM pokemon WHERE position IN (SELECT pokemon FROM learnset WHERE move = "
+            "(SELECT position FROM move WHERE name = ? ORDER BY position LIMIT 1)) ORDER BY dex_number, id, position",
+            (move_name,)).fetchall()
+
+    @classmethod
+    def get_holders(cls, ability_name):
+        """Returns rows of pokemons that can have the ability with a column telling whether it is hidden"""
+        return cls.__connection.execute(
+            "SELECT pokemon.*, hidden FROM pokemon_ability JOIN pokemon ON pokemon.position = pokemon_ability.pokemon "
+            "WHERE ability = (SELECT position FROM ability WHERE name = ? ORDER BY position LIMIT 1) "
+            "ORDER BY dex_number, id, pokemon.position, slot", (ability_name,)).fetchall()
+
+    @classmethod
+    def filter_pokemons(cls, name=None, primary=None, secondary=None, generation=None, order=0, ranges=None,
+                        sort_by=None, descending=True, limit=None, generations=None):
+        """Returns rows of pokemons that pass the same filters as Pokemons.get_pokemons_by_stats. Generations
+        ({roman numeral: number}) are needed when generation is one of the ranges"""
+        conditions = []
+        parameters = []
+        if name is not None:
+            conditions.append("matches_name(name, ?)")
+            parameters.append(name.lower())
+        for column, value in (("primary_type", primary), ("secondary_type", secondary)):
+            if value is not None:
+                conditions.append(f"{column} = (SELECT position FROM type WHERE name = ? ORDER BY position LIMIT 1)")
+                parameters.append(value)
+        if generation is not None:
+            conditions.append("generation = ?")
+            parameters.append(generation)
+        for column, (lowest, highest) in (ranges or {}).items():
+            if column == "generation":
+                numerals = [numeral for numeral, number in generations.items()
+                            if (lowest is None or number >= lowest) and (highest is None or number <= highest)]
+                conditions.append(f"generation IN ({', '.join(['?'] * len(numerals))})")
+                parameters.extend(numerals)
+                continue
+            column = cls.__column(column)
+            for bound, operator in ((lowest, ">="), (highest, "<=")):
+                if bound is not None:
+                    conditions.append(f"{column} {operator} ?")
+                    parameters.append(bound)
+
+        query = "SELECT * FROM pokemon"
+        if len(conditions) > 0:
+            query += " WHERE " + " AND ".join(conditions)
+        if sort_by is not None:
+            column = cls.__column(sort_by) if sort_by != "generation" else \
+                "CASE generation " + " ".join(f"WHEN '{numeral}' THEN {number}"
+                                              for numeral, number in generations.items()) + " ELSE 0 END"
+            query += f" ORDER BY {column} {'DESC' if descending else 'ASC'}, dex_number, position"
+        else:
+            query += " ORDER BY dex_number, id, position" if order == 0 else " ORDER BY name, position"
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(limit)
+        return cls.__connection.execute(query, parameters).fetchall()
+
+    @classmethod
+    def __column(cls, column):
+        # only known columns are put into queries
+        if column in cls.__stat_columns:
+            return cls.__stat_columns[column]
+        if column in ("total", "height", "weight", "dex_number"):
+            return column
+        raise KeyError(column)
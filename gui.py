@@ -1,29 +1,34 @@
 import io
 import tkinter as tk
 import tkinter.ttk as ttk
-import urllib.request
 from tkinter import messagebox
 from tkinter.filedialog import asksaveasfile, askopenfile
-from urllib import error
 import pyglet
 import ctypes
 from PIL import ImageTk, Image
 from pokemon import *
+from connection_pool import ConnectionPool
 import socket
 import webbrowser
 import requests
 
-# import fonts used in a program
-try:
-    pokemon_font_path = os.path.abspath("Fonts\\Pokemon Solid.ttf")
-    default_font_path = os.path.abspath("Fonts\\IBMPlexMono-Light.ttf")
-    pyglet.font.add_file(pokemon_font_path)
-    pyglet.font.add_file(default_font_path)
-    pokemon_font = "Pokemon Solid"
-    default_font = "IBMPlexMono-Light"
-except FileNotFoundError:
-    default_font = "Arial"
-    pokemon_font = "Arial"
+# fonts used in a program, replaced by load_fonts if they can be loaded
+default_font = "Arial"
+pokemon_font = "Arial"
+
+
+def load_fonts():
+    global default_font, pokemon_font
+    try:
+        pokemon_font_path = os.path.abspath("Fonts\\Pokemon Solid.ttf")
+        default_font_path = os.path.abspath("Fonts\\IBMPlexMono-Light.ttf")
+        pyglet.font.add_file(pokemon_font_path)
+        pyglet.font.add_file(default_font_path)
+        pokemon_font = "Pokemon Solid"
+        default_font = "IBMPlexMono-Light"
+    except FileNotFoundError:
+        default_font = "Arial"
+        pokemon_font = "Arial"
 
 generations = ["I - Kanto", "II - Johto", "III - Hoenn", "IV - Sinnoh", "V - Unova", "VI - Kalos", "VII - Alola",
                "VIII - Galar"]
@@ -661,6 +666,8 @@ class ScrollablePokemonFrame(tk.Frame):
 class PokemonInfoWindow(tk.Toplevel):
     def __init__(self, master, pokemon):
         super().__init__(master)
+        # list of pokemons only reads their names and types, the rest is read for the shown pokemon
+        pokemon.load_details()
         self.geometry("700x500")
         self.winfo_toplevel().title(pokemon.name)
         self.protocol("WM_DELETE_WINDOW", self.__on_close)
@@ -702,13 +709,13 @@ class PokemonInfoWindow(tk.Toplevel):
         artwork = pokemon.sprites["other"]["official-artwork"]["front_default"]
         if artwork is not None:
             try:
-                raw_artwork = urllib.request.urlopen(artwork).read()
+                raw_artwork = ConnectionPool.get(artwork).content
                 read_artwork = Image.open(io.BytesIO(raw_artwork))
                 self.image_artwork = ImageTk.PhotoImage(read_artwork)
                 self.artwork = tk.Label(self.frame, image=self.image_artwork, borderwidth=2, relief='solid',
                                         background="white")
                 self.artwork.pack(side='top')
-            except urllib.error.URLError:
+            except (requests.exceptions.RequestException, OSError):
                 print("Failed to load artwork image. Connect to the Internet")
 
         self.desc = tk.Label(self.frame, text=pokemon.description, font=(default_font, 16, "normal", "italic"),
@@ -729,12 +736,12 @@ class PokemonInfoWindow(tk.Toplevel):
         front_sprite = pokemon.sprites["front_default"]
         if front_sprite is not None:
             try:
-                raw_sprite = urllib.request.urlopen(front_sprite).read()
+                raw_sprite = ConnectionPool.get(front_sprite).content
                 read_sprite = Image.open(io.BytesIO(raw_sprite))
                 self.image_sprite = ImageTk.PhotoImage(read_sprite)
                 self.sprite = tk.Label(self.short_pokemon_info, image=self.image_sprite, borderwidth=1, relief='solid')
                 self.sprite.grid(row=0, column=0, rowspan=2, sticky='nsew')
-            except urllib.error.URLError:
+            except (requests.exceptions.RequestException, OSError):
                 print("Failed to load sprite image. Connect to the Internet")
 
         self.name_label = tk.Label(self.short_pokemon_info, text=pokemon.name, anchor='center', borderwidth=1,
@@ -1062,10 +1069,11 @@ class HelpWindow(tk.Toplevel):
 
 def start_gui():
     try:
-        Types.prepare_types()
-        Abilities.prepare_abilities()
-        Moves.prepare_moves()
-        Pokemons.prepare_pokemons()
+        # fonts are loaded while stores are being prepared
+        loader = startup_loader()
+        loader.add_stage("fonts", load_fonts)
+        loader.run()
+        loader.print_timings()
         mw = MainWindow()
         mw.mainloop()
     except requests.exceptions.RequestException:
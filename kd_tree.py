@@ -0,0 +1,110 @@
+import numpy as np
+
+
+class KDTree:
+    """Tree that splits points in half by the coordinate with the widest spread until at most leaf_size points are
+    left. Nearest points are found by visiting only the halves that can still hold something closer than the points
+    found so far"""
+
+    __brute_force_size = 256  # when filters leave fewer points than that it is faster to check all of them
+
+    def __init__(self, points, leaf_size=64):
+        self.__points = np.asarray(points, dtype=np.float64)
+        self.__indexes = np.arange(len(self.__points))
+        # node is [start, end, split dimension, split value, left child, right child], children of a leaf are -1
+        self.__nodes = []
+        if len(self.__points) == 0:
+            return
+        self.__nodes.append([0, len(self.__points), -1, 0.0, -1, -1])
+        stack = [0]
+        while len(stack) > 0:
+            node = self.__nodes[stack.pop()]
+            start, end = node[0], node[1]
+            if end - start <= leaf_size:
+                continue
+            indexes = self.__indexes[start:end]
+            points = self.__points[indexes]
+            dimension = int(np.argmax(points.max(axis=0) - points.min(axis=0)))
+            middle = (end - start) // 2
+            order = np.argpartition(points[:, dimension], middle)
+            self.__indexes[start:end] = indexes[order]
+            node[2] = dimension
+            node[3] = points[order[middle], dimension]
+            node[4] = len(self.__nodes)
+            node[5] = len(self.__nodes) + 1
+            self.__nodes.append([start, start + middle, -1, 0.0, -1, -1])
+            self.__nodes.append([start + middle, end, -1, 0.0, -1, -1])
+            stack.extend([node[4], node[5]])
+
+    def __len__(self):
+        return len(self.__points)
+
+    def __leaves(self, point, limit, rows):
+        """Yields indexes of points from leaves that can hold points closer than limit() in the order of how close
+        they might be"""
+        stack = [(0, 0.0)] if len(self.__nodes) > 0 else []
+        while len(stack) > 0:
+            node, bound = stack.pop()
+            if bound > limit():
+                continue
+            start, end, dimension, split, left, right = self.__nodes[node]
+            if left == -1:
+                indexes = self.__indexes[start:end]
+                yield indexes if rows is None else indexes[rows[indexes]]
+                continue
+            difference = point[dimension] - split
+            near, far = (left, right) if difference < 0 else (right, left)
+            # far half is at least as far as the splitting plane
+            stack.append((far, max(bound, abs(difference))))
+            stack.append((near, bound))
+
+    def __distances(self, point, indexes):
+        return np.sqrt(((self.__points[indexes] - point) ** 2).sum(axis=1))
+
+    def nearest(self, point, k, rows=None):
+        """Returns indexes and distances of k points closest to the given one. If rows bitset is given only points
+        set in it are considered"""
+        point = np.asarray(point, dtype=np.float64)
+        if rows is not None and rows.sum() <= self.__brute_force_size:
+            indexes = np.flatnonzero(rows)
+            return self.__closest(indexes, self.__distances(point, indexes), k)
+
+        best = [np.zeros(0, dtype=np.int64), np.zeros(0), np.inf]  # indexes, distances, distance of the k-th one
+
+        def limit():
+            return best[2]
+
+        for indexes in self.__leaves(point, limit, rows):
+            distances = self.__distances(point, indexes)
+            closer = distances < best[2]
+            if not closer.any():
+                continue
+            indexes = np.concatenate([best[0], indexes[closer]])
+            distances = np.concatenate([best[1], distances[closer]])
+            if len(indexes) > k:
+                selected = np.argpartition(distances, k - 1)[:k]
+                indexes, distances = indexes[selected], distances[selected]
+            best = [indexes, distances, distances.max() if len(indexes) == k else np.inf]
+        return self.__closest(best[0], best[1], k)
+
+    def within(self, point, radius, rows=None):
+        """Returns indexes and distances of points not further than radius from the given one, closest first"""
+        point = np.asarray(point, dtype=np.float64)
+        if rows is not None and rows.sum() <= self.__brute_force_size:
+            found = [np.flatnonzero(rows)]
+        else:
+            found = list(self.__leaves(point, lambda: radius, rows))
+        indexes = np.concatenate(found) if len(found) > 0 else np.zeros(0, dtype=np.int64)
+        distances = self.__distances(point, indexes)
+        close = distances <= radius
+        return self.__closest(indexes[close], distances[close], len(indexes))
+
+    @staticmethod
+    def __closest(indexes, distances, k):
+        if k <= 0:
+            return indexes[:0], distances[:0]
+        if k < len(indexes):
+            selected = np.argpartition(distances, k - 1)[:k]
+            indexes, distances = indexes[selected], distances[selected]
+        order = np.lexsort((indexes, distances))
+        return indexes[order], distances[order]
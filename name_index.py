@@ -0,0 +1,73 @@
+from Levenshtein import distance
+
+
+class NameIndex:
+    """Fuzzy index of names. Finds every object whose name contains the searched text or is less than max_distance
+    edits away from it without comparing the text with every name: n-gram postings narrow down names that can contain
+    the text and a BK-tree skips names that are too far away by the triangle inequality"""
+
+    __gram_size = 3
+
+    def __init__(self, max_distance=4):
+        self.__max_distance = max_distance
+        self.__objects = {}  # lowercase name -> objects with that name
+        self.__grams = {}  # every 1, 2 and 3 character long part of a name -> names that contain it
+        self.__root = None  # BK-tree node is [name, {distance to child: child node}]
+
+    def __len__(self):
+        return len(self.__objects)
+
+    @classmethod
+    def __grams_of(cls, text, size):
+        return {text[index:index + size] for index in range(len(text) - size + 1)}
+
+    def add(self, name, obj):
+        name = name.lower()
+        if name in self.__objects:
+            self.__objects[name].append(obj)
+            return
+        self.__objects[name] = [obj]
+        for size in range(1, self.__gram_size + 1):
+            for gram in self.__grams_of(name, size):
+                self.__grams.setdefault(gram, set()).add(name)
+
+        if self.__root is None:
+            self.__root = [name, {}]
+            return
+        node = self.__root
+        while True:
+            edits = distance(name, node[0])
+            if edits not in node[1]:
+                node[1][edits] = [name, {}]
+                return
+            node = node[1][edits]
+
+    def __containing(self, text):
+        if text == "":
+            return set(self.__objects)
+        postings = sorted((self.__grams.get(gram, set())
+                           for gram in self.__grams_of(text, min(len(text), self.__gram_size))), key=len)
+        names = set(postings[0]).intersection(*postings[1:])
+        if len(text) > self.__gram_size:
+            # every part of the text being in a name doesn't mean that the name contains the whole text
+            names = {name for name in names if text in name}
+        return names
+
+    def __close_to(self, text):
+        names = set()
+        limit = self.__max_distance - 1
+        nodes = [self.__root] if self.__root is not None else []
+        while len(nodes) > 0:
+            name, children = nodes.pop()
+            edits = distance(text, name)
+            if edits <= limit:
+                names.add(name)
+            for child_edits, child in children.items():
+                if edits - limit <= child_edits <= edits + limit:
+                    nodes.append(child)
+        return names
+
+    def search(self, text):
+        """Returns list of objects whose name contains the text or is less than max_distance edits away from it"""
+        text = text.lower()
+        return [obj for name in self.__containing(text) | self.__close_to(text) for obj in self.__objects[name]]
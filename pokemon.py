@@ -1,13 +1,25 @@
+import json
 import os
 import pickle
 import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import timedelta
 from time import time
-from Levenshtein import distance
+import numpy as np
 
+from columnar_file import ColumnarFile, LazyRecords, is_columnar_file, write_columns
+from database import Database
+from kd_tree import KDTree
+from name_index import NameIndex
 from pokemon_exceptions import NoGivenTypeException as NGTE, NoGivenMoveException as NGME, \
     NoGivenAbilityException as NGAE, NoGivenPokemonException as NGPE
 from requester import Requester
+from snapshot import ReferenceUnpickler
+from startup import StartupLoader
+from stats_table import StatsTable
+from sync_journal import SyncJournal
+from sync_manifest import SyncManifest
+from text_index import TextIndex
 
 
 def proper_word(word):
@@ -23,9 +35,95 @@ def split_then_proper_word(word_with_dashes):
     return " ".join([proper_word(word) for word in word_with_dashes.split('-')])
 
 
+def score_teams(team_positions, defence_matrix, offence_matrix):
+    """Scores teams given as rows of type positions (-1 marks an empty slot). Returns per-type defence and offence
+    points together with counts of terrible, bad, good and great types for every team. Lives outside of Types so that
+    it can run in worker processes"""
+    teams, size = len(team_positions), len(defence_matrix)
+    # last column collects empty slots and is dropped afterwards
+    counts = np.zeros((teams, size + 1), dtype=np.float32)
+    rows = np.arange(teams)
+    for slot in range(team_positions.shape[1]):
+        counts[rows, team_positions[:, slot]] += 1
+    counts = counts[:, :size]
+    # float product goes through blas and stays exact for such small integers
+    defence = (counts @ defence_matrix.astype(np.float32)).astype(np.int16)
+    offence = (counts @ offence_matrix.astype(np.float32)).astype(np.int16)
+    return defence, offence, count_buckets(defence), count_buckets(offence)
+
+
+def count_buckets(points):
+    """Counts terrible, bad, good and great types in every row of points"""
+    return np.stack([(points <= -2).sum(axis=1),
+                     ((-2 < points) & (points < 0)).sum(axis=1),
+                     ((0 < points) & (points < 2)).sum(axis=1),
+                     (2 <= points).sum(axis=1)], axis=1)
+
+
+def index_descriptions(descriptions, kind):
+    """Builds full text index of descriptions, documents are their positions in the list"""
+    start = time()
+    index = TextIndex()
+    for position, description in enumerate(descriptions):
+        index.add(position, description or "")
+    documents, words, postings, size = index.get_statistics()
+    print(f"{kind} descriptions indexed in: {timedelta(seconds=time() - start)} ({documents} documents, {words} words, "
+          f"{postings} postings, {size} bytes)")
+    return index
+
+
+def load_with_references(file):
+    """Reads pickled list of moves or pokemons. Returns tuple (objects, whether they were saved with references to
+    loaded objects). Files saved before references were used hold their own copies of types, moves and abilities"""
+    registries = {}
+    for kind, objects in (("type", Types.get_types()), ("move", Moves.get_moves()),
+                          ("ability", Abilities.get_abilities())):
+        by_id = {}
+        by_name = {}
+        for obj in objects:
+            by_name.setdefault(obj.name, obj)
+            if obj.id is not None:
+                by_id.setdefault(obj.id, obj)
+        registries[kind] = (by_id, by_name)
+    unpickler = ReferenceUnpickler(file, registries)
+    objects = unpickler.load()
+    return objects, unpickler.references > 0
+
+
+def merge_object(objects, new_object):
+    """Updates object with the same id (or the same name for objects saved before ids were stored) in place so that
+    every reference to it sees the new data. Returns False if there was no such object"""
+    for obj in objects:
+        if (obj.id is not None and obj.id == new_object.id) or (obj.id is None and obj.name == new_object.name):
+            obj.__dict__.update(new_object.__dict__)
+            return True
+    return False
+
+
+def from_database(table, row):
+    """Returns object described by a row of a table of the database. Every row is built only once, so objects refer to
+    the same types, moves and abilities like loaded ones do"""
+    def build(row):
+        if table == "type":
+            return Type.from_row(row, Database.get_damage_relations(row["position"]))
+        if table == "ability":
+            return Ability.from_row(row)
+        if table == "move":
+            return Move.from_row(row, from_database("type", Database.get_row("type", "position", row["type"])))
+        return Pokemon.from_row(row, Database.get_stats(row),
+                                [(from_database("ability", ability), bool(ability["hidden"]))
+                                 for ability in Database.get_pokemon_abilities(row["position"])],
+                                [from_database("move", move) for move in Database.get_learnset(row["position"])],
+                                [from_database("type", typ) for typ in Database.get_pokemon_types(row)])
+    return Database.get_object(table, row, build)
+
+
 class Type:
+    __id = None  # types saved before ids were stored don't have their own
+
     def __init__(self, request_json):
         damage_relations = request_json["damage_relations"]
+        self.__id = request_json["id"]
         self.__name = proper_word(request_json["name"])
         self.__double_from = [proper_word(typ["name"]) for typ in damage_relations["double_damage_from"]]
         self.__double_to = [proper_word(typ["name"]) for typ in damage_relations["double_damage_to"]]
@@ -34,6 +132,10 @@ class Type:
         self.__no_from = [proper_word(typ["name"]) for typ in damage_relations["no_damage_from"]]
         self.__no_to = [proper_word(typ["name"]) for typ in damage_relations["no_damage_to"]]
 
+    @property
+    def id(self):
+        return self.__id
+
     @property
     def name(self):
         return self.__name
@@ -62,6 +164,20 @@ class Type:
     def no_to(self):
         return self.__no_to
 
+    @classmethod
+    def from_row(cls, row, relations):
+        """Builds type from a row of the database and its damage relations ({relation: names of types})"""
+        typ = cls.__new__(cls)
+        typ.__id = row["id"]
+        typ.__name = row["name"]
+        typ.__double_from = relations["double_from"]
+        typ.__double_to = relations["double_to"]
+        typ.__half_from = relations["half_from"]
+        typ.__half_to = relations["half_to"]
+        typ.__no_from = relations["no_from"]
+        typ.__no_to = relations["no_to"]
+        return typ
+
     def __eq__(self, other):
         return str(other) == self.__name
 
@@ -71,13 +187,56 @@ class Type:
 
 class Types:
     __types = []
+    __types_by_name = {}
+    __types_by_id = {}
+    __type_names = []  # names of types in the order of matrix rows and columns
+    __type_positions = {}  # type name -> row and column in the matrices
+    __defence_matrix = np.zeros((0, 0), dtype=np.int8)  # [defending type, attacking type] -> points
+    __offence_matrix = np.zeros((0, 0), dtype=np.int8)  # [attacking type, defending type] -> points
     __directory = "SavedData"
     __file_name = "types.data"
 
     @classmethod
     def create_types(cls, json_types):
         for typ in json_types:
-            cls.__types.append(Type(typ))
+            new_type = Type(typ)
+            cls.__types.append(new_type)
+            cls.__index_type(new_type)
+        cls.__compile_damage_relations()
+
+    @classmethod
+    def __index_type(cls, typ):
+        # the first type with a given name is the one that is found
+        cls.__types_by_name.setdefault(typ.name, typ)
+        if typ.id is not None:
+            cls.__types_by_id.setdefault(typ.id, typ)
+
+    @classmethod
+    def __index_types(cls):
+        cls.__types_by_name = {}
+        cls.__types_by_id = {}
+        for typ in cls.__types:
+            cls.__index_type(typ)
+
+    @classmethod
+    def __compile_damage_relations(cls):
+        """Turns damage relations of every type into matrices of points used by calculate_defence and
+        calculate_offence, so that scoring a team doesn't have to walk the lists of type names"""
+        cls.__type_names = list(cls.__types_by_name)
+        cls.__type_positions = {name: position for position, name in enumerate(cls.__type_names)}
+        size = len(cls.__type_names)
+        cls.__defence_matrix = np.zeros((size, size), dtype=np.int8)
+        cls.__offence_matrix = np.zeros((size, size), dtype=np.int8)
+        for typ in cls.__types_by_name.values():
+            row = cls.__type_positions[typ.name]
+            for relations, matrix, points in ((typ.no_from, cls.__defence_matrix, 2),
+                                              (typ.half_from, cls.__defence_matrix, 1),
+                                              (typ.double_from, cls.__defence_matrix, -1),
+                                              (typ.no_to, cls.__offence_matrix, -2),
+                                              (typ.half_to, cls.__offence_matrix, -1),
+                                              (typ.double_to, cls.__offence_matrix, 1)):
+                for inner_type in relations:
+                    matrix[row, cls.__type_positions[inner_type]] += points
 
     @classmethod
     def save_types(cls):
@@ -98,27 +257,62 @@ class Types:
             file_path = os.path.abspath(cls.__directory)
             file_path += f"\\{cls.__file_name}"
             if not os.path.exists(file_path):
-                cls.create_types(Requester.request_types())
+                cls.create_types(Requester.stream_types(known=SyncManifest.reset("type")))
                 cls.save_types()
+                SyncManifest.save()
             else:
                 with open(file_path, "rb") as file:
                     cls.__types = pickle.load(file)
+                cls.__index_types()
+                cls.__compile_damage_relations()
             print(f"Types loaded in: {timedelta(seconds=time() - start_time)}")  # print measured time
         except OSError:
             raise
 
+    @classmethod
+    def update_types(cls):
+        """Downloads only types added or changed since the last download and merges them into the loaded ones"""
+        start = time()
+        updated = 0
+        for typ in Requester.stream_types(known=SyncManifest.get("type"), revalidate=True):
+            new_type = Type(typ)
+            if not merge_object(cls.__types, new_type):
+                cls.__types.append(new_type)
+            updated += 1
+        cls.__index_types()
+        cls.__compile_damage_relations()
+        cls.save_types()
+        SyncManifest.save()
+        print(f"Types updated ({updated} new or changed) in: {timedelta(seconds=time() - start)}")
+
     @classmethod
     def get_type(cls, name):
         name = proper_word(name)
-        types_found = [typ for typ in cls.__types if typ.name == name]
-        if len(types_found) > 0:
-            return types_found[0]
-        else:
+        try:
+            if Database.is_open():
+                return from_database("type", Database.get_row("type", "name", name))
+            return cls.__types_by_name[name]
+        except KeyError:
             raise NGTE(name)
 
+    @classmethod
+    def get_type_by_id(cls, type_id):
+        try:
+            if Database.is_open():
+                return from_database("type", Database.get_row("type", "id", type_id))
+            return cls.__types_by_id[type_id]
+        except KeyError:
+            raise NGTE(type_id)
+
+    @classmethod
+    def get_types(cls):
+        if Database.is_open():
+            return [from_database("type", row) for row in Database.get_rows("type")]
+        return cls.__types
+
     @classmethod
     def get_types_string_list(cls):
-        return sorted([typ.name for typ in cls.__types])
+        return sorted([typ.name for typ in cls.get_types()])
 
     @classmethod
     def print_types(cls):
@@ -127,84 +321,89 @@ class Types:
             print(typ)
 
     @classmethod
-    def calculate_defence(cls, list_of_types):
-        type_points = {}
-        for typ in cls.__types:
-            type_points[typ.name] = 0
-        for typ in list_of_types:
-            try:
-                current_type = Types.get_type(proper_word(typ))
-                for inner_type in current_type.no_from:
-                    type_points[inner_type] += 2
-                for inner_type in current_type.half_from:
-                    type_points[inner_type] += 1
-                for inner_type in current_type.double_from:
-                    type_points[inner_type] -= 1
-            except NGTE:
-                print(f"No such type as {typ}")
-        terrible = []
-        bad = []
-        good = []
-        great = []
-        for typ in type_points:
-            value = type_points[typ]
-            if value <= -2:
-                terrible.append(typ)
-            elif -2 < value < 0:
-                bad.append(typ)
-            elif 0 < value < 2:
-                good.append(typ)
-            elif 2 <= value:
-                great.append(typ)
-
-        terrible.sort(key=lambda t: t)
-        bad.sort(key=lambda t: t)
-        good.sort(key=lambda t: t)
-        great.sort(key=lambda t: t)
+    def get_type_names(cls):
+        """Returns names of types in the order of columns of points returned by score methods"""
+        return list(cls.__type_names)
 
-        return terrible, bad, good, great
+    @classmethod
+    def encode_teams(cls, teams):
+        """Converts teams given as lists of up to 6 (primary, secondary) type name pairs into an array of type positions
+        accepted by calculate_teams. Missing and unknown types, as well as secondary types that repeat the primary one,
+        become empty slots"""
+        positions = np.full((len(teams), 12), -1, dtype=np.int16)
+        for team_index, team in enumerate(teams):
+            for pair_index, (primary, secondary) in enumerate(team[:6]):
+                if primary:
+                    positions[team_index, 2 * pair_index] = cls.__type_positions.get(proper_word(primary), -1)
+                if secondary and secondary != primary:
+                    positions[team_index, 2 * pair_index + 1] = cls.__type_positions.get(proper_word(secondary), -1)
+        return positions
 
     @classmethod
-    def calculate_offence(cls, list_of_types):
-        type_points = {}
-        for typ in cls.__types:
-            type_points[typ.name] = 0
+    def calculate_teams(cls, teams, processes=None, chunk_size=100000):
+        """Scores many teams at once. Teams are either lists of (primary, secondary) type name pairs or an array
+        made by encode_teams. Returns tuple (defence points, offence points, defence buckets, offence buckets) where
+        points have a column for every type from get_type_names and buckets count terrible, bad, good and great types.
+        If processes is given, teams are split into chunks scored by a pool of processes"""
+        if not isinstance(teams, np.ndarray):
+            teams = cls.encode_teams(teams)
+        if processes is None or processes < 2 or len(teams) <= chunk_size:
+            return score_teams(teams, cls.__defence_matrix, cls.__offence_matrix)
+
+        chunks = [teams[start:start + chunk_size] for start in range(0, len(teams), chunk_size)]
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(score_teams, chunks, [cls.__defence_matrix] * len(chunks),
+                                        [cls.__offence_matrix] * len(chunks)))
+        return tuple(np.concatenate([result[part] for result in results]) for part in range(4))
+
+    @classmethod
+    def get_type_counts(cls, list_of_types):
+        """Returns vector that tells how many times every type occurs in the list. Rows of such vectors can be passed
+        to get_defence_points and get_offence_points to score many teams at once"""
+        counts = np.zeros(len(cls.__type_names), dtype=np.int32)
         for typ in list_of_types:
             try:
-                current_type = Types.get_type(proper_word(typ))
-                for inner_type in current_type.no_to:
-                    type_points[inner_type] -= 2
-                for inner_type in current_type.half_to:
-                    type_points[inner_type] -= 1
-                for inner_type in current_type.double_to:
-                    type_points[inner_type] += 1
-            except NGTE:
+                counts[cls.__type_positions[proper_word(typ)]] += 1
+            except KeyError:
                 print(f"No such type as {typ}")
-        terrible = []
-        bad = []
-        good = []
-        great = []
-        for typ in type_points:
-            value = type_points[typ]
-            if value <= -2:
-                terrible.append(typ)
-            elif -2 < value < 0:
-                bad.append(typ)
-            elif 0 < value < 2:
-                good.append(typ)
-            elif 2 <= value:
-                great.append(typ)
-
-        terrible.sort(key=lambda t: t)
-        bad.sort(key=lambda t: t)
-        good.sort(key=lambda t: t)
-        great.sort(key=lambda t: t)
+        return counts
+
+    @classmethod
+    def get_defence_points(cls, type_counts):
+        """Returns points of every attacking type against team(s) described by type counts. The more points the
+        better the team resists the type"""
+        return type_counts @ cls.__defence_matrix
+
+    @classmethod
+    def get_offence_points(cls, type_counts):
+        """Returns points of team(s) described by type counts against every defending type. The more points the
+        better the team hits the type"""
+        return type_counts @ cls.__offence_matrix
 
+    @classmethod
+    def __bucket(cls, type_points):
+        names = np.array(cls.__type_names, dtype=object)
+        terrible = sorted(names[type_points <= -2])
+        bad = sorted(names[(-2 < type_points) & (type_points < 0)])
+        good = sorted(names[(0 < type_points) & (type_points < 2)])
+        great = sorted(names[2 <= type_points])
         return terrible, bad, good, great
 
+    @classmethod
+    def calculate_defence(cls, list_of_types):
+        return cls.__bucket(cls.get_defence_points(cls.get_type_counts(list_of_types)))
+
+    @classmethod
+    def calculate_offence(cls, list_of_types):
+        return cls.__bucket(cls.get_offence_points(cls.get_type_counts(list_of_types)))
+
 
 class Move:
+    __id = None  # moves saved before ids were stored don't have their own
+
     def __init__(self, request_json):
+        self.__id = request_json["id"]
+
         # there are moves like vine-whip, flying-press
         self.__name = split_then_proper_word(request_json["name"])
 
@@ -265,6 +464,36 @@ class Move:
     def type(self):
         return self.__type.name
 
+    def relink(self, types):
+        """Points move at the loaded type with the same name as its own ({name: type})"""
+        self.__type = types.get(self.__type.name, self.__type)
+
+    @classmethod
+    def from_row(cls, row, typ):
+        """Builds move from a row of the database"""
+        move = cls.__new__(cls)
+        move.__id = row["id"]
+        move.__name = row["name"]
+        move.__accuracy = row["accuracy"]
+        move.__class = row["move_class"]
+        move.__desc = row["description"]
+        move.__effect_chance = row["effect_chance"]
+        move.__power = row["power"]
+        move.__pp = row["pp"]
+        move.__priority = row["priority"]
+        move.__type = typ
+        return move
+
+    # columns of the store moves are saved in (see columnar_file.py) and attributes they hold
+    schema = [("id", "int", "_Move__id"), ("name", "str", "_Move__name"), ("accuracy", "json", "_Move__accuracy"),
+              ("move_class", "str", "_Move__class"), ("description", "str", "_Move__desc"),
+              ("effect_chance", "json", "_Move__effect_chance"), ("power", "json", "_Move__power"),
+              ("pp", "json", "_Move__pp"), ("priority", "int", "_Move__priority"), ("type", "ref", "_Move__type")]
+
+    @property
+    def id(self):
+        return self.__id
+
     @property
     def name(self):
         return self.__name
@@ -289,15 +518,44 @@ class Move:
 
 
 class Moves:
-    __moves = []
+    __moves = LazyRecords(Move)
+    __moves_by_name = {}
+    __moves_by_id = {}
+    __text_index = TextIndex()
     __directory = "SavedData"
     __file_name = "moves.data"
 
     @classmethod
-    def create_moves(cls, json_moves):
-        for move in json_moves:
-            cls.__moves.append(Move(move))
+    def create_moves(cls, json_moves, journal=None):
+        try:
+            for move in json_moves:
+                new_move = Move(move)
+                cls.__moves.append(new_move)
+                cls.__index_move(len(cls.__moves) - 1)
+                if journal is not None:
+                    journal.add(move["id"], new_move, SyncManifest.get("move").get(move["id"]))
+        finally:
+            # moves built before the download failed are kept for the next attempt
+            if journal is not None:
+                journal.flush()
         cls.__fix_z_moves()
+        # z-moves got renamed or removed
+        cls.__index_moves()
+
+    @classmethod
+    def __index_move(cls, position):
+        # the first move with a given name is the one that is found
+        cls.__moves_by_name.setdefault(cls.__moves.value(position, "name"), position)
+        move_id = cls.__moves.value(position, "id")
+        if move_id is not None:
+            cls.__moves_by_id.setdefault(move_id, position)
+
+    @classmethod
+    def __index_moves(cls):
+        cls.__moves_by_name = {}
+        cls.__moves_by_id = {}
+        for position in range(len(cls.__moves)):
+            cls.__index_move(position)
 
     @classmethod
     def __fix_z_moves(cls):
@@ -307,10 +565,9 @@ class Moves:
             move.move_class = "Z-move"
 
         # z-moves are doubled and have names ending with either word physical or special
-        z_moves = [move for move in z_moves if re.match(r"^.*\s(Physical|Special)$", move.name) is not None]
-
-        z_moves_physical = z_moves[::2]
-        z_moves_special = z_moves[1::2]
+        # moves are downloaded concurrently so their order can't be relied on - they are told apart by the suffix
+        z_moves_physical = [move for move in z_moves if re.match(r"^.*\sPhysical$", move.name) is not None]
+        z_moves_special = [move for move in z_moves if re.match(r"^.*\sSpecial$", move.name) is not None]
 
         # physical z-moves have description - get rid of 'Physical' suffix
         for move in z_moves_physical:
@@ -322,6 +579,13 @@ class Moves:
         for move in z_moves_special:
             cls.__moves.remove(move)
 
+    @classmethod
+    def __relink(cls):
+        """Replaces copies of types held by moves with the loaded types"""
+        types = {typ.name: typ for typ in Types.get_types()}
+        for move in cls.__moves:
+            move.relink(types)
+
     @classmethod
     def save_moves(cls):
         try:
@@ -329,8 +593,9 @@ class Moves:
             if not os.path.exists(file_path):
                 os.mkdir(file_path)
             file_path += f"\\{cls.__file_name}"
-            with open(file_path, "wb") as file:
-                pickle.dump(cls.__moves, file)
+            # moves read from the file have to be built before it can be written again
+            cls.__moves.detach()
+            write_columns(file_path, cls.__moves, Move.schema)
         except OSError:
             raise
 
@@ -340,29 +605,108 @@ class Moves:
             start = time()  # start measuring time
             file_path = os.path.abspath(cls.__directory)
             file_path += f"\\{cls.__file_name}"
+            journal = SyncJournal("moves")
             if not os.path.exists(file_path):
-                cls.create_moves(Requester.request_moves())
+                # moves built before the last download got interrupted
+                cls.__moves = LazyRecords(Move, journal.load())
+                cls.__relink()
+                cls.__index_moves()
+                # moves from the journal aren't downloaded again so their fingerprints are taken from it
+                known = SyncManifest.reset("move")
+                known.update(journal.fingerprints())
+                cls.create_moves(Requester.stream_moves(journal.completed_ids(), known), journal)
                 cls.save_moves()
+                SyncManifest.save()
+            elif is_columnar_file(file_path):
+                # moves are built when something asks for them
+                cls.__moves = LazyRecords(Move, store=ColumnarFile(file_path, {"type": Types.get_type}))
+                cls.__index_moves()
             else:
                 with open(file_path, "rb") as file:
-                    cls.__moves = pickle.load(file)
+                    moves, with_references = load_with_references(file)
+                cls.__moves = LazyRecords(Move, moves)
+                if not with_references:
+                    cls.__relink()
+                cls.__index_moves()
+            journal.remove()
+            cls.__build_text_index()
             print(f"Moves loaded in: {timedelta(seconds=time() - start)}")  # print measured time
         except OSError:
             raise
 
+    @classmethod
+    def update_moves(cls):
+        """Downloads only moves added or changed since the last download and merges them into the loaded ones"""
+        start = time()
+        updated = 0
+        for move in Requester.stream_moves(known=SyncManifest.get("move"), revalidate=True):
+            new_move = Move(move)
+            if not merge_object(cls.__moves, new_move):
+                cls.__moves.append(new_move)
+            updated += 1
+        cls.__fix_z_moves()
+        cls.__index_moves()
+        cls.save_moves()
+        SyncManifest.save()
+        cls.__build_text_index()
+        print(f"Moves updated ({updated} new or changed) in: {timedelta(seconds=time() - start)}")
+
     @classmethod
     def get_move(cls, name):
-        name = split_then_proper_word(name)
-        move_found = [move for move in cls.__moves if move.name == name]
-        if len(move_found) > 0:
-            return move_found[0]
-        else:
+        return cls.find_move(split_then_proper_word(name))
+
+    @classmethod
+    def find_move(cls, name):
+        """Returns move with exactly the given name, without converting it like get_move does"""
+        try:
+            if Database.is_open():
+                return from_database("move", Database.get_row("move", "name", name))
+            return cls.__moves[cls.__moves_by_name[name]]
+        except KeyError:
             raise NGME(name)
 
+    @classmethod
+    def get_move_by_id(cls, move_id):
+        try:
+            if Database.is_open():
+                return from_database("move", Database.get_row("move", "id", move_id))
+            return cls.__moves[cls.__moves_by_id[move_id]]
+        except KeyError:
+            raise NGME(move_id)
+
     @classmethod
     def get_moves(cls):
+        if Database.is_open():
+            return [from_database("move", row) for row in Database.get_rows("move")]
         return cls.__moves
 
+    @classmethod
+    def __build_text_index(cls):
+        cls.__text_index = index_descriptions(cls.__moves.column("description"), "Move")
+
+    @classmethod
+    def search_moves(cls, query, limit=None):
+        """Returns moves whose description matches the query best first. Quoted phrases have to appear in the
+        description and words ending with * match every word that starts with them, eg. 'raise* "speed"'"""
+        return [cls.__moves[position] for position, _ in cls.__text_index.search(query, limit)]
+
+    @classmethod
+    def get_learners(cls, move):
+        """Returns pokemons (sorted by dex number) that learn the given move or move with the given name. Name can be
+        either displayed (Stealth Rock) or the one used by the api (stealth-rock)"""
+        if isinstance(move, str):
+            try:
+                move = cls.find_move(move)
+            except NGME:
+                move = cls.get_move(move)
+        return Pokemons.get_learners(move.name)
+
+    @classmethod
+    def get_learners_of_every_move(cls):
+        """Returns dictionary {move name: pokemons that learn it} for every loaded move"""
+        names = [move.name for move in cls.get_moves()] if Database.is_open() else cls.__moves.column("name")
+        return {name: Pokemons.get_learners(name) for name in names}
+
     @classmethod
     def print_moves(cls):
         print("Available moves:")
@@ -377,7 +721,10 @@ class Moves:
 
 
 class Ability:
+    __id = None  # abilities saved before ids were stored don't have their own
+
     def __init__(self, request_json):
+        self.__id = request_json["id"]
 
         # there are abilities like sheer-will or rain-dish
         self.__name = split_then_proper_word(request_json["name"])
@@ -397,6 +744,10 @@ class Ability:
         if self.__desc is None:
             self.__desc = "No description found."
 
+    @property
+    def id(self):
+        return self.__id
+
     @property
     def name(self):
         return self.__name
@@ -409,6 +760,15 @@ class Ability:
     def description(self, desc):
         self.__desc = desc
 
+    @classmethod
+    def from_row(cls, row):
+        """Builds ability from a row of the database"""
+        ability = cls.__new__(cls)
+        ability.__id = row["id"]
+        ability.__name = row["name"]
+        ability.__desc = row["description"]
+        return ability
+
     def __eq__(self, other):
         return str(other) == self.__name
 
@@ -418,24 +778,37 @@ class Ability:
 
 class Abilities:
     __abilities = []
+    __abilities_by_name = {}
+    __abilities_by_id = {}
+    __text_index = TextIndex()
     __directory = "SavedData"
     __file_name = "abilities.data"
 
     @classmethod
     def create_abilities(cls, json_abilities):
-        # names of all abilities created during this method call
-        names = []
         for ability in json_abilities:
             new_ability = Ability(ability)
-            if new_ability.name not in names:
+            previous_ability = cls.__abilities_by_name.get(new_ability.name)
+            if previous_ability is None:
                 cls.__abilities.append(new_ability)
-                names.append(new_ability.name)
-            else:
-                # if there is another ability with the exact same name their descriptions will merge
-                for previous_ability in cls.__abilities:
-                    if previous_ability == new_ability:
-                        previous_ability.description += f"/\n{new_ability.description}"
-                        break
+                cls.__index_ability(new_ability)
+            # if there is another ability with the exact same name their descriptions will merge
+            # description could have been merged already by one of the previous downloads
+            elif new_ability.description not in previous_ability.description:
+                previous_ability.description += f"/\n{new_ability.description}"
+
+    @classmethod
+    def __index_ability(cls, ability):
+        cls.__abilities_by_name.setdefault(ability.name, ability)
+        if ability.id is not None:
+            cls.__abilities_by_id.setdefault(ability.id, ability)
+
+    @classmethod
+    def __index_abilities(cls):
+        cls.__abilities_by_name = {}
+        cls.__abilities_by_id = {}
+        for ability in cls.__abilities:
+            cls.__index_ability(ability)
 
     @classmethod
     def save_abilities(cls):
@@ -456,24 +829,99 @@ class Abilities:
             file_path = os.path.abspath(cls.__directory)
             file_path += f"\\{cls.__file_name}"
             if not os.path.exists(file_path):
-                cls.create_abilities(Requester.request_abilities())
+                cls.create_abilities(Requester.stream_abilities(known=SyncManifest.reset("ability")))
                 cls.save_abilities()
+                SyncManifest.save()
             else:
                 with open(file_path, "rb") as file:
                     cls.__abilities = pickle.load(file)
+                cls.__index_abilities()
+            cls.__build_text_index()
             print(f"Abilities loaded in: {timedelta(seconds=time() - start)}")  # print measured time
         except OSError:
             raise
 
+    @classmethod
+    def update_abilities(cls):
+        """Downloads only abilities added or changed since the last download and merges them into the loaded ones"""
+        start = time()
+        new_abilities = []
+        for ability in Requester.stream_abilities(known=SyncManifest.get("ability"), revalidate=True):
+            new_ability = Ability(ability)
+            stored_ability = cls.__abilities_by_id.get(new_ability.id)
+            if stored_ability is None:
+                stored_ability = cls.__abilities_by_name.get(new_ability.name)
+                stored_ability = stored_ability if stored_ability is not None and stored_ability.id is None else None
+            # descriptions merged in from abilities with the same name follow the first one and are kept
+            if stored_ability is not None and "/\n" in stored_ability.description:
+                merged = stored_ability.description.split("/\n", 1)[1]
+                new_ability.description += f"/\n{merged}"
+            if not merge_object(cls.__abilities, new_ability):
+                new_abilities.append(ability)
+        cls.__index_abilities()
+        # abilities that weren't saved before may share their name with a saved one
+        cls.create_abilities(new_abilities)
+        cls.save_abilities()
+        SyncManifest.save()
+        cls.__build_text_index()
+        print(f"Abilities updated in: {timedelta(seconds=time() - start)}")
+
+    @classmethod
+    def get_abilities(cls):
+        if Database.is_open():
+            return [from_database("ability", row) for row in Database.get_rows("ability")]
+        return cls.__abilities
+
+    @classmethod
+    def __build_text_index(cls):
+        cls.__text_index = index_descriptions([ability.description for ability in cls.__abilities], "Ability")
+
+    @classmethod
+    def search_abilities(cls, query, limit=None):
+        """Returns abilities whose description matches the query best first (see Moves.search_moves)"""
+        return [cls.__abilities[position] for position, _ in cls.__text_index.search(query, limit)]
+
+    @classmethod
+    def get_holders(cls, ability, hidden=None):
+        """Returns list of tuples (pokemon, is hidden) for pokemons that can have the given ability. If hidden is
+        given only pokemons with (or without) the ability hidden are returned. Name can be either displayed
+        (Sheer Force) or the one used by the api (sheer-force)"""
+        if isinstance(ability, str):
+            try:
+                ability = cls.find_ability(ability)
+            except NGAE:
+                ability = cls.get_ability(ability)
+        holders = Pokemons.get_holders(ability.name)
+        return holders if hidden is None else [holder for holder in holders if holder[1] == hidden]
+
+    @classmethod
+    def get_holders_of_every_ability(cls):
+        """Returns dictionary {ability name: [(pokemon, is hidden)]} for every loaded ability"""
+        return {ability.name: Pokemons.get_holders(ability.name) for ability in cls.get_abilities()}
+
     @classmethod
     def get_ability(cls, name):
-        name = split_then_proper_word(name)
-        found_abilities = [ability for ability in cls.__abilities if ability.name == name]
-        if len(found_abilities) > 0:
-            return found_abilities[0]
-        else:
+        return cls.find_ability(split_then_proper_word(name))
+
+    @classmethod
+    def find_ability(cls, name):
+        """Returns ability with exactly the given name, without converting it like get_ability does"""
+        try:
+            if Database.is_open():
+                return from_database("ability", Database.get_row("ability", "name", name))
+            return cls.__abilities_by_name[name]
+        except KeyError:
             raise NGAE(name)
 
+    @classmethod
+    def get_ability_by_id(cls, ability_id):
+        try:
+            if Database.is_open():
+                return from_database("ability", Database.get_row("ability", "id", ability_id))
+            return cls.__abilities_by_id[ability_id]
+        except KeyError:
+            raise NGAE(ability_id)
+
     @classmethod
     def print_abilities(cls):
         print("Available abilities:")
@@ -488,7 +936,13 @@ class Abilities:
 
 
 class Pokemon:
+    __details = None  # function returning attributes that weren't read from the store yet
+
+    # columns read from the store only when the pokemon is shown or searched by them
+    detail_columns = ["description", "stats", "abilities", "moves", "sprites"]
+
     def __init__(self, dex_number, legendary, mythic, generation, flavor_text, genera, request_text):
+        self.__details = None
         # there are pokemons like mr-mime or articuno-galar
         self.__name = split_then_proper_word(request_text["name"])
 
@@ -506,6 +960,7 @@ class Pokemon:
         self.__generation = generation
         self.__height = request_text["height"]
         self.__weight = request_text["weight"]
+        # only sprites shown by the program are left in the response (see projection.py)
         self.__sprites = request_text["sprites"]
         self.__genera = genera
 
@@ -546,12 +1001,17 @@ class Pokemon:
     def dex_number(self):
         return self.__dex_number
 
+    @property
+    def id(self):
+        return self.__order
+
     @property
     def order(self):
         return self.__order
 
     @property
     def description(self):
+        self.load_details()
         return self.__desc
 
     @property
@@ -572,10 +1032,12 @@ class Pokemon:
 
     @property
     def stats(self):
+        self.load_details()
         return self.__stats
 
     @property
     def moves(self):
+        self.load_details()
         return self.__moves
 
     @property
@@ -584,12 +1046,69 @@ class Pokemon:
 
     @property
     def abilities(self):
+        self.load_details()
         return self.__abilities
 
     @property
     def sprites(self):
+        self.load_details()
         return self.__sprites
 
+    def attach_details(self, details):
+        """Makes the pokemon call details (function returning {attribute: value}) the first time it needs any of the
+        detail columns"""
+        self.__details = details
+
+    def load_details(self):
+        """Reads description, stats, abilities, moves and sprites if they weren't read yet"""
+        if self.__details is not None:
+            details, self.__details = self.__details, None
+            self.__dict__.update(details())
+
+    def relink(self, types, moves, abilities):
+        """Points references of this pokemon at objects from given dictionaries {name: object} so that updated
+        types, moves and abilities are seen by it"""
+        self.load_details()
+        self.__types = [types.get(typ.name, typ) for typ in self.__types]
+        self.__moves = [moves.get(move.name, move) for move in self.__moves]
+        self.__abilities = [(abilities.get(ability.name, ability), hidden) for ability, hidden in self.__abilities]
+
+    @classmethod
+    def from_row(cls, row, stats, abilities, moves, types):
+        """Builds pokemon from a row of the database and objects it refers to"""
+        pokemon = cls.__new__(cls)
+        pokemon.__name = row["name"]
+        pokemon.__dex_number = row["dex_number"]
+        pokemon.__desc = row["description"]
+        pokemon.__order = row["id"]
+        pokemon.__legendary = bool(row["legendary"])
+        pokemon.__mythic = bool(row["mythical"])
+        pokemon.__generation = row["generation"]
+        pokemon.__height = row["height"]
+        pokemon.__weight = row["weight"]
+        pokemon.__sprites = json.loads(row["sprites"])
+        pokemon.__genera = row["genera"]
+        pokemon.__stats = stats
+        pokemon.__abilities = abilities
+        pokemon.__moves = moves
+        pokemon.__types = types
+        return pokemon
+
+    # columns of the store pokemons are saved in (see columnar_file.py) and attributes they hold
+    schema = [("name", "str", "_Pokemon__name"), ("dex_number", "int", "_Pokemon__dex_number"),
+              ("description", "str", "_Pokemon__desc"), ("order", "int", "_Pokemon__order"),
+              ("legendary", "bool", "_Pokemon__legendary"), ("mythical", "bool", "_Pokemon__mythic"),
+              ("generation", "str", "_Pokemon__generation"), ("height", "int", "_Pokemon__height"),
+              ("weight", "int", "_Pokemon__weight"), ("sprites", "json", "_Pokemon__sprites"),
+              ("genera", "str", "_Pokemon__genera"), ("stats", "pairs", "_Pokemon__stats"),
+              ("abilities", "flagged refs", "_Pokemon__abilities"), ("moves", "refs", "_Pokemon__moves"),
+              ("types", "refs", "_Pokemon__types")]
+
+    def __getstate__(self):
+        # functions reading details can't be pickled, so details are read first
+        self.load_details()
+        return self.__dict__
+
     def __eq__(self, other):
         return str(other) == self.__name
 
@@ -598,15 +1117,178 @@ class Pokemon:
 
 
 class Pokemons:
-    __pokemons = []
+    __pokemons = LazyRecords(Pokemon)
+    __pokemons_by_name = {}  # name -> position in __pokemons
+    __pokemons_by_id = {}  # id -> position in __pokemons
+    __name_index = NameIndex()  # fuzzy search over names used by get_filtered_pokemons
+    # orderings are pokemons sorted by dex number and by name
+    __ranks = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))  # position in __pokemons -> place in orderings
+    __positions = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))  # place in orderings -> position
+    # numeric attributes, row i belongs to i-th pokemon in __pokemons. Built when it is first needed since base
+    # stats are details of pokemons
+    __stats_table = None
+    __stats_tree = None  # normalized base stats of rows of the stats table
+    # filter value -> (bitset over pokemons sorted by dex number, bitset over pokemons sorted by name)
+    __primary_postings = {}
+    __secondary_postings = {}
+    __generation_postings = {}
+    # learnsets are read from their file when they are first needed
+    __learners = None  # move name -> positions of pokemons that learn it
+    __holders = None  # ability name -> [(position of pokemon, is hidden)]
+    __text_index = None  # built on the first search
     __directory = "SavedData"
     __file_name = "pokemons.data"
+    __learnsets_file_name = "learnsets.data"
+
+    @classmethod
+    def create_pokemons(cls, pokemons, journal=None):
+        try:
+            for pokemon in pokemons:
+                new_pokemon = Pokemon(pokemon[0], pokemon[1], pokemon[2], pokemon[3], pokemon[4], pokemon[5],
+                                      pokemon[6])
+                cls.__pokemons.append(new_pokemon)
+                cls.__index_pokemon(len(cls.__pokemons) - 1, new_pokemon.name, new_pokemon.id)
+                if journal is not None:
+                    journal.add(new_pokemon.order, new_pokemon, SyncManifest.get("pokemon").get(new_pokemon.order))
+        finally:
+            # pokemons built before the download failed are kept for the next attempt
+            if journal is not None:
+                journal.flush()
+        cls.__build_postings()
+        cls.__build_learnsets()
 
     @classmethod
-    def create_pokemons(cls, pokemons):
-        for pokemon in pokemons:
-            cls.__pokemons.append(
-                Pokemon(pokemon[0], pokemon[1], pokemon[2], pokemon[3], pokemon[4], pokemon[5], pokemon[6]))
+    def __index_pokemon(cls, position, name, pokemon_id):
+        cls.__pokemons_by_name.setdefault(name, position)
+        cls.__pokemons_by_id.setdefault(pokemon_id, position)
+        cls.__name_index.add(name, position)
+
+    @classmethod
+    def __index_pokemons(cls):
+        cls.__pokemons_by_name = {}
+        cls.__pokemons_by_id = {}
+        cls.__name_index = NameIndex()
+        # whole columns are read at once instead of row by row
+        for position, (name, pokemon_id) in enumerate(zip(cls.__pokemons.column("name"),
+                                                          cls.__pokemons.column("order"))):
+            cls.__index_pokemon(position, name, pokemon_id)
+        cls.__build_postings()
+
+    @classmethod
+    def __build_postings(cls):
+        """Sorts pokemons in both orders once and marks which of them have every primary type, secondary type and
+        generation, so that get_filtered_pokemons only has to combine bitsets. Only summary columns are read, so
+        pokemons loaded from the store are not built and their details are not read"""
+        size = len(cls.__pokemons)
+        names = cls.__pokemons.column("name")
+        dex_numbers = cls.__pokemons.column("dex_number")
+        orders = cls.__pokemons.column("order")
+        ranks = []
+        all_positions = []
+        for key in (lambda position: (dex_numbers[position], orders[position]), lambda position: names[position]):
+            positions = sorted(range(size), key=key)
+            rank = np.empty(size, dtype=np.int64)
+            rank[positions] = np.arange(size)
+            ranks.append(rank)
+            all_positions.append(np.array(positions, dtype=np.int64))
+        cls.__ranks = tuple(ranks)
+        cls.__positions = tuple(all_positions)
+        generations = cls.__pokemons.column("generation")
+        cls.__stats_table = None
+        cls.__stats_tree = None
+        cls.__text_index = None
+
+        # positions of pokemons with every value are collected first and turned into bitsets at once
+        members = ({}, {}, {})
+        for position, types in enumerate(cls.__pokemons.column("types")):
+            values = (types[0].name if len(types) > 0 else None, types[1].name if len(types) > 1 else None,
+                      generations[position])
+            for positions, value in zip(members, values):
+                if value is not None:
+                    positions.setdefault(value, []).append(position)
+        all_postings = []
+        for positions_of_values in members:
+            postings = {}
+            for value, positions in positions_of_values.items():
+                bitsets = (np.zeros(size, dtype=bool), np.zeros(size, dtype=bool))
+                for order in range(2):
+                    bitsets[order][cls.__ranks[order][positions]] = True
+                postings[value] = bitsets
+            all_postings.append(postings)
+        cls.__primary_postings, cls.__secondary_postings, cls.__generation_postings = all_postings
+
+    @classmethod
+    def __get_stats_table(cls):
+        if cls.__stats_table is None:
+            cls.__stats_table = StatsTable(cls.__pokemons.column("stats"), cls.__pokemons.column("height"),
+                                           cls.__pokemons.column("weight"), cls.__pokemons.column("dex_number"),
+                                           cls.__pokemons.column("generation"))
+            cls.__stats_tree = KDTree(cls.__stats_table.get_stat_vectors())
+        return cls.__stats_table
+
+    @classmethod
+    def __build_learnsets(cls):
+        """Reverse indexes of moves and abilities. Pokemons are visited by dex number so every list is sorted"""
+        cls.__learners = {}
+        cls.__holders = {}
+        for position in cls.__positions[0].tolist():
+            for move in cls.__pokemons.value(position, "moves"):
+                learners = cls.__learners.setdefault(move.name, [])
+                if len(learners) == 0 or learners[-1] != position:
+                    learners.append(position)
+            for ability, hidden in cls.__pokemons.value(position, "abilities"):
+                cls.__holders.setdefault(ability.name, []).append((position, hidden))
+
+    @classmethod
+    def __load_learnsets(cls, file_path):
+        """Reads reverse indexes saved with pokemons. They are built again if they don't match loaded pokemons"""
+        try:
+            with open(file_path, "rb") as file:
+                learnsets = pickle.load(file)
+            # learnsets saved before pokemons had a store hold ids instead of positions
+            if learnsets["pokemons"] != len(cls.__pokemons) or not learnsets.get("positions", False):
+                raise KeyError("pokemons")
+            cls.__learners = learnsets["moves"]
+            cls.__holders = learnsets["abilities"]
+        except (OSError, EOFError, pickle.UnpicklingError, KeyError):
+            cls.__build_learnsets()
+
+    @classmethod
+    def __load_learnsets_if_needed(cls):
+        if cls.__learners is None or cls.__holders is None:
+            cls.__load_learnsets(os.path.abspath(cls.__directory) + f"\\{cls.__learnsets_file_name}")
+
+    @classmethod
+    def search_pokemons(cls, query, limit=None):
+        """Returns pokemons whose pokedex entry matches the query best first (see Moves.search_moves)"""
+        if cls.__text_index is None:
+            cls.__text_index = index_descriptions(cls.__pokemons.column("description"), "Pokemon")
+        return [cls.__pokemons[position] for position, _ in cls.__text_index.search(query, limit)]
+
+    @classmethod
+    def get_learners(cls, move_name):
+        """Returns pokemons that learn the move with the given name sorted by dex number"""
+        if Database.is_open():
+            return [from_database("pokemon", row) for row in Database.get_learners(move_name)]
+        cls.__load_learnsets_if_needed()
+        return [cls.__pokemons[position] for position in cls.__learners.get(move_name, [])]
+
+    @classmethod
+    def get_holders(cls, ability_name):
+        """Returns list of (pokemon, is hidden) of pokemons that can have the ability with the given name"""
+        if Database.is_open():
+            return [(from_database("pokemon", row), bool(row["hidden"])) for row in Database.get_holders(ability_name)]
+        cls.__load_learnsets_if_needed()
+        return [(cls.__pokemons[position], hidden) for position, hidden in cls.__holders.get(ability_name, [])]
+
+    @classmethod
+    def __relink(cls):
+        """Points every pokemon at loaded types, moves and abilities instead of their copies or older versions"""
+        types = {typ.name: typ for typ in Types.get_types()}
+        moves = {move.name: move for move in Moves.get_moves()}
+        abilities = {ability.name: ability for ability in Abilities.get_abilities()}
+        for pokemon in cls.__pokemons:
+            pokemon.relink(types, moves, abilities)
 
     @classmethod
     def save_pokemons(cls):
@@ -614,9 +1296,14 @@ class Pokemons:
             file_path = os.path.abspath(cls.__directory)
             if not os.path.exists(file_path):
                 os.mkdir(file_path)
-            file_path += f"\\{cls.__file_name}"
-            with open(file_path, "wb") as file:
-                pickle.dump(cls.__pokemons, file)
+            cls.__load_learnsets_if_needed()
+            # pokemons read from the file have to be built before it can be written again
+            cls.__pokemons.detach()
+            write_columns(file_path + f"\\{cls.__file_name}", cls.__pokemons, Pokemon.schema)
+            # pokemons are saved by their positions in the store so that the file doesn't repeat the whole dataset
+            with open(file_path + f"\\{cls.__learnsets_file_name}", "wb") as file:
+                pickle.dump({"pokemons": len(cls.__pokemons), "positions": True, "moves": cls.__learners,
+                             "abilities": cls.__holders}, file)
         except OSError:
             raise
 
@@ -626,52 +1313,192 @@ class Pokemons:
             start = time()
             file_path = os.path.abspath(cls.__directory)
             file_path += f"\\{cls.__file_name}"
+            journal = SyncJournal("pokemons")
             if not os.path.exists(file_path):
-                cls.create_pokemons(Requester.request_pokemons())
+                # pokemons built before the last download got interrupted
+                cls.__pokemons = LazyRecords(Pokemon, journal.load())
+                cls.__relink()
+                cls.__index_pokemons()
+                # pokemons from the journal aren't downloaded again so their fingerprints are taken from it
+                known = SyncManifest.reset("pokemon")
+                known.update(journal.fingerprints())
+                cls.create_pokemons(Requester.stream_pokemons(journal.completed_ids(), known), journal)
                 cls.save_pokemons()
+                SyncManifest.save()
+            elif is_columnar_file(file_path):
+                # pokemons are built when something asks for them, indexes only read columns they need
+                cls.__pokemons = LazyRecords(Pokemon, store=ColumnarFile(file_path, {
+                    "types": Types.get_type, "moves": Moves.find_move, "abilities": Abilities.find_ability}))
+                cls.__index_pokemons()
+                cls.__learners = None
+                cls.__holders = None
             else:
                 with open(file_path, "rb") as file:
-                    cls.__pokemons = pickle.load(file)
+                    pokemons, with_references = load_with_references(file)
+                cls.__pokemons = LazyRecords(Pokemon, pokemons)
+                if not with_references:
+                    cls.__relink()
+                cls.__index_pokemons()
+                cls.__learners = None
+                cls.__holders = None
+            journal.remove()
             print(f"Pokemons loaded in: {timedelta(seconds=time() - start)}")
         except OSError:
             raise
 
     @classmethod
-    def get_filtered_pokemons(cls, name=None, primary=None, secondary=None, generation=None, order=0):
-        if order == 0:
-            filtered_pokemons = sorted(cls.__pokemons, key=lambda pok: (pok.dex_number, pok.order))
-        else:
-            filtered_pokemons = sorted(cls.__pokemons, key=lambda pok: pok.name)
+    def update_pokemons(cls):
+        """Downloads only pokemons added or changed since the last download and merges them into the loaded ones.
+        Every pokemon is then pointed at current types, moves and abilities so that updates made to them are seen"""
+        start = time()
+        updated = 0
+        for pokemon in Requester.stream_pokemons(known=SyncManifest.get("pokemon"), revalidate=True):
+            new_pokemon = Pokemon(pokemon[0], pokemon[1], pokemon[2], pokemon[3], pokemon[4], pokemon[5], pokemon[6])
+            if not merge_object(cls.__pokemons, new_pokemon):
+                cls.__pokemons.append(new_pokemon)
+            updated += 1
+        cls.__index_pokemons()
+        cls.__relink()
+        cls.__build_learnsets()
+
+        cls.save_pokemons()
+        SyncManifest.save()
+        print(f"Pokemons updated ({updated} new or changed) in: {timedelta(seconds=time() - start)}")
 
+    @classmethod
+    def __filter(cls, name, primary, secondary, generation, order):
+        """Returns bitset over pokemons in the given order that pass every filter"""
+        found = np.ones(len(cls.__pokemons), dtype=bool)
         if name is not None:
-            name = name.lower()
-            filtered_pokemons = [pokemon for pokemon in filtered_pokemons if name in pokemon.name.lower() or distance(
-                name, pokemon.name.lower()) < 4]
-        if primary is not None:
-            filtered_pokemons = [pokemon for pokemon in filtered_pokemons if
-                                 len(pokemon.types) > 0 and pokemon.types[0].name == primary]
-        if secondary is not None:
-            filtered_pokemons = [pok for pok in filtered_pokemons if
-                                 len(pok.types) > 1 and pok.types[1].name == secondary]
-        if generation is not None:
-            filtered_pokemons = [pok for pok in filtered_pokemons if pok.generation == generation]
+            # names that contain the searched one or are less than 4 edits away from it
+            found[:] = False
+            found[cls.__ranks[order][np.array(cls.__name_index.search(name), dtype=np.int64)]] = True
+
+        for postings, value in ((cls.__primary_postings, primary), (cls.__secondary_postings, secondary),
+                                (cls.__generation_postings, generation)):
+            if value is not None:
+                if value not in postings:
+                    found[:] = False
+                    break
+                found &= postings[value][order]
+        return found
 
-        return filtered_pokemons
+    @classmethod
+    def get_filtered_pokemons(cls, name=None, primary=None, secondary=None, generation=None, order=0):
+        order = 0 if order == 0 else 1
+        if Database.is_open():
+            return [from_database("pokemon", row) for row in
+                    Database.filter_pokemons(name, primary, secondary, generation, order)]
+        found = cls.__filter(name, primary, secondary, generation, order)
+        return [cls.__pokemons[position] for position in cls.__positions[order][np.flatnonzero(found)].tolist()]
+
+    @classmethod
+    def get_stats_table(cls):
+        return cls.__get_stats_table()
+
+    @classmethod
+    def get_pokemons_by_stats(cls, ranges=None, sort_by=None, descending=True, limit=None, name=None, primary=None,
+                              secondary=None, generation=None, order=0):
+        """Returns pokemons whose numeric attributes fall into {column: (lowest, highest)} ranges (see
+        StatsTable.columns) and pass the same filters as get_filtered_pokemons. Result is sorted by the sort_by column
+        or, without it, by the order of get_filtered_pokemons. Limit cuts the result to the first pokemons, eg.
+        get_pokemons_by_stats({"speed": (100, None), "total": (500, None)}, sort_by="attack", limit=10)"""
+        order = 0 if order == 0 else 1
+        if Database.is_open():
+            return [from_database("pokemon", row) for row in
+                    Database.filter_pokemons(name, primary, secondary, generation, order, ranges, sort_by, descending,
+                                             limit, StatsTable.generations)]
+        # bitset over the ordering is turned into bitset over rows of the stats table
+        rows = cls.__filter(name, primary, secondary, generation, order)[cls.__ranks[order]]
+        rows = cls.__get_stats_table().filter(ranges or {}, rows)
+        if sort_by is not None:
+            return [cls.__pokemons[row] for row in cls.__stats_table.sort(rows, sort_by, descending, limit).tolist()]
+        positions = cls.__positions[order][np.flatnonzero(rows[cls.__positions[order]])[:limit]]
+        return [cls.__pokemons[position] for position in positions.tolist()]
+
+    @classmethod
+    def __similar(cls, pokemon, search, primary, secondary, generation):
+        pokemon = cls.get_pokemon(pokemon) if isinstance(pokemon, str) else pokemon
+        rows = None
+        if primary is not None or secondary is not None or generation is not None:
+            rows = cls.__filter(None, primary, secondary, generation, 0)[cls.__ranks[0]]
+        indexes, distances = search(cls.__get_stats_table().get_stat_vector(pokemon), rows)
+        return [(cls.__pokemons[index], float(distance)) for index, distance in zip(indexes.tolist(), distances)
+                if cls.__pokemons[index] is not pokemon]
+
+    @classmethod
+    def get_similar_pokemons(cls, pokemon, k=5, primary=None, secondary=None, generation=None):
+        """Returns k pokemons with base stats closest to the given pokemon (or pokemon with the given name) as list of
+        tuples (pokemon, distance). Stats are normalized by their spread before distances are measured. Pokemons can
+        be narrowed down by the same filters as in get_filtered_pokemons"""
+        return cls.__similar(pokemon, lambda vector, rows: cls.__stats_tree.nearest(vector, k + 1, rows),
+                             primary, secondary, generation)[:k]
+
+    @classmethod
+    def get_pokemons_within(cls, pokemon, radius, primary=None, secondary=None, generation=None):
+        """Returns every pokemon whose normalized base stats are not further than radius from the given pokemon's as
+        list of tuples (pokemon, distance), closest first"""
+        return cls.__similar(pokemon, lambda vector, rows: cls.__stats_tree.within(vector, radius, rows),
+                             primary, secondary, generation)
 
     @classmethod
     def get_pokemon(cls, name):
-        found_pokemons = [p for p in cls.__pokemons if p.name == proper_word(name)]
-        if len(found_pokemons) > 0:
-            return found_pokemons[0]
-        else:
+        try:
+            if Database.is_open():
+                return from_database("pokemon", Database.get_row("pokemon", "name", proper_word(name)))
+            return cls.__pokemons[cls.__pokemons_by_name[proper_word(name)]]
+        except KeyError:
             raise NGPE(name)
 
+    @classmethod
+    def get_pokemon_by_id(cls, pokemon_id):
+        try:
+            if Database.is_open():
+                return from_database("pokemon", Database.get_row("pokemon", "id", pokemon_id))
+            return cls.__pokemons[cls.__pokemons_by_id[pokemon_id]]
+        except KeyError:
+            raise NGPE(pokemon_id)
+
+    @classmethod
+    def get_pokemons(cls):
+        if Database.is_open():
+            return [from_database("pokemon", row) for row in Database.get_rows("pokemon")]
+        return cls.__pokemons
+
     @classmethod
     def print_pokemons(cls):
         for pok in cls.__pokemons:
             print(pok)
 
 
+def startup_loader():
+    """Returns loader that prepares every store as soon as stores it refers to are prepared. Abilities are prepared
+    together with types and moves, more stages can be added before it is run"""
+    loader = StartupLoader()
+    loader.add_stage("types", Types.prepare_types)
+    loader.add_stage("abilities", Abilities.prepare_abilities)
+    loader.add_stage("moves", Moves.prepare_moves, ["types"])
+    loader.add_stage("pokemons", Pokemons.prepare_pokemons, ["types", "moves", "abilities"])
+    return loader
+
+
+def update_dataset():
+    """Brings saved data up to date with the api. Stores have to be prepared first"""
+    Types.update_types()
+    Abilities.update_abilities()
+    Moves.update_moves()
+    Pokemons.update_pokemons()
+    if Database.exists():
+        save_database()
+
+
+def save_database():
+    """Copies prepared stores into the SQLite database (see database.py)"""
+    start = time()
+    Database.save(Types.get_types(), Abilities.get_abilities(), Moves.get_moves(), Pokemons.get_pokemons())
+    print(f"Database saved in: {timedelta(seconds=time() - start)}")
+
+
 if __name__ == '__main__':
     Abilities.prepare_abilities()
     Abilities.print_abilities_with_description()
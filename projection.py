@@ -0,0 +1,63 @@
+# Fields of api responses that are read by PepeDex models. Everything else is dropped as soon as a response is parsed
+# so that neither downloads in progress nor saved data hold parts of the api that are never used.
+# Field mapped to None is kept whole, field mapped to a dictionary keeps only the listed fields of the nested object
+# (or of every object of the nested list).
+
+name_only = {"name": None}
+english_text = {"language": name_only}
+
+projections = {
+    "type": {
+        "id": None,
+        "name": None,
+        "damage_relations": {
+            "double_damage_from": name_only,
+            "double_damage_to": name_only,
+            "half_damage_from": name_only,
+            "half_damage_to": name_only,
+            "no_damage_from": name_only,
+            "no_damage_to": name_only
+        }
+    },
+    "move": {
+        "id": None,
+        "name": None,
+        "accuracy": None,
+        "damage_class": name_only,
+        "flavor_text_entries": {"flavor_text": None, **english_text},
+        "effect_chance": None,
+        "power": None,
+        "pp": None,
+        "priority": None,
+        "type": name_only
+    },
+    "ability": {
+        "id": None,
+        "name": None,
+        "effect_entries": {"effect": None, **english_text},
+        "flavor_text_entries": {"flavor_text": None, **english_text}
+    },
+    "pokemon": {
+        "id": None,
+        "name": None,
+        "height": None,
+        "weight": None,
+        "sprites": {
+            "front_default": None,
+            "other": {"official-artwork": {"front_default": None}}
+        },
+        "stats": {"base_stat": None, "stat": name_only},
+        "abilities": {"ability": name_only, "is_hidden": None},
+        "moves": {"move": name_only},
+        "types": {"type": name_only}
+    }
+}
+
+
+def project(value, projection):
+    """Returns copy of parsed json value that contains only fields named by the projection"""
+    if projection is None or value is None:
+        return value
+    if isinstance(value, list):
+        return [project(element, projection) for element in value]
+    return {field: project(value[field], inner) for field, inner in projection.items() if field in value}
@@ -1,183 +1,459 @@
+import asyncio
+import hashlib
+import queue as sync_queue
+import random
 import requests
 import threading
 from concurrent.futures import ThreadPoolExecutor
+from time import monotonic, sleep
+from urllib.parse import urlsplit
+from connection_pool import ConnectionPool
+from projection import projections, project
+from response_cache import ResponseCache
 
 
 class TooManyFailedRequestsException(Exception):
-    """Raised when too many requests failed in a row"""
+    """Raised at the end of a download when some resources couldn't be retrieved even after retrying them"""
 
-    def __init__(self, max_no_of_tries):
-        message = f"Failed to retrieve resource from API ({max_no_of_tries} or more requests failed in a row)"
+    def __init__(self, failed_resources, max_no_of_tries):
+        failed = ", ".join(sorted(failed_resources))
+        message = f"Failed to retrieve {len(failed_resources)} resource(s) from API after {max_no_of_tries} " \
+                  f"attempts each: {failed}"
         super().__init__(message)
 
 
+class TokenBucket:
+    """Limits how many requests per second are sent to the api. Bucket refills 'rate' tokens every second and holds
+    at most 'capacity' of them so that short bursts are still allowed"""
+
+    def __init__(self, rate, capacity=None):
+        self.__rate = rate
+        self.__capacity = capacity if capacity is not None else rate
+        self.__tokens = self.__capacity
+        self.__updated = monotonic()
+
+    async def acquire(self):
+        while True:
+            now = monotonic()
+            self.__tokens = min(self.__capacity, self.__tokens + (now - self.__updated) * self.__rate)
+            self.__updated = now
+            if self.__tokens >= 1:
+                self.__tokens -= 1
+                return
+            await asyncio.sleep((1 - self.__tokens) / self.__rate)
+
+
 class Requester:
-    __number_of_retries = 10
-    __NUMBER_OF_TYPES = 18
-    __NUMBER_OF_MOVES = 796
-    __NUMBER_OF_ABILITIES = 267
-    __NUMBER_OF_POKEMON = 898
-    __moves_to_be_skipped = [785]  # empty move records in the pokemon api
+    __max_attempts = 6  # attempts made for a single resource before it's reported as failed
+    __base_delay = 0.5  # seconds before the first retry, doubled with every following attempt
+    __max_delay = 30
+    __requests_per_second = 25  # fair use limit of the api
+    __concurrency = 32  # number of requests kept in flight at the same time
+    __page_size = 200  # number of resources listed by a single page of api listing
+    __max_main_series_id = 10000  # resources with greater ids are shadow/unknown or outside of main games
     __api_address = "https://pokeapi.co/api/v2/"
     __api_type = "type/"
     __api_move = "move/"
     __api_ability = "ability/"
     __api_pokemon = "pokemon-species/"
-    __temporary_container = []
-    __container_lock = threading.Lock()
-    __internet_issue_flag = False
-    __no_resource_flag = False
-    __fails_in_a_row = 0
+    __received = 0  # number of records received during the current download
+    __end_of_stream = object()
+    __token_bucket = None
+    __attempts = {}  # url -> number of failed attempts
+    __retry_tasks = set()
+    __failed_resources = {}  # url -> reason of the last failure
+    __variety_species = {}  # url of pokemon variety -> information about its species
+    __species_fingerprints = {}  # url of pokemon variety -> fingerprint of its species response
+    __known = None  # resource id -> fingerprint of resources that don't have to be returned again if unchanged
+    __revalidate = False
+    # state of a download is kept in the class, so stores prepared at the same time download one after another
+    __download_lock = threading.Lock()
+
+    @classmethod
+    def set_concurrency(cls, concurrency):
+        """Sets how many requests are kept in flight at the same time while downloading resources"""
+        if concurrency < 1:
+            raise ValueError("Concurrency has to be a positive number")
+        cls.__concurrency = concurrency
+
+    @classmethod
+    def get_concurrency(cls):
+        return cls.__concurrency
+
+    @classmethod
+    def set_rate_limit(cls, requests_per_second):
+        """Sets how many requests per second can be sent to the api"""
+        if requests_per_second <= 0:
+            raise ValueError("Rate limit has to be a positive number")
+        cls.__requests_per_second = requests_per_second
 
     @classmethod
-    def __increase_fails(cls):
-        cls.__container_lock.acquire()
-        cls.__fails_in_a_row += 1
+    def set_max_attempts(cls, attempts):
+        """Sets how many times a single resource is requested before it's reported as failed"""
+        if attempts < 1:
+            raise ValueError("Number of attempts has to be a positive number")
+        cls.__max_attempts = attempts
 
-        if cls.__fails_in_a_row >= cls.__number_of_retries:
-            cls.__no_resource_flag = True
+    @classmethod
+    def get_failed_resources(cls):
+        """Returns dictionary {resource: reason} of resources that failed permanently during the last download"""
+        return {cls.__resource_name(url): reason for url, reason in cls.__failed_resources.items()}
 
-        cls.__container_lock.release()
+    @classmethod
+    def __backoff(cls, attempts):
+        # exponential backoff with jitter so that retries of many resources don't hit the api at the same moment
+        return min(cls.__max_delay, cls.__base_delay * 2 ** (attempts - 1)) * random.uniform(0.5, 1.5)
+
+    @classmethod
+    async def __get(cls, executor, address):
+        # requests and reading of the cache are blocking so every call is handed to a thread of the executor
+        loop = asyncio.get_running_loop()
+        if not cls.__revalidate:
+            # responses that are still fresh in the cache don't reach the api so they don't use up tokens
+            response = await loop.run_in_executor(executor, ResponseCache.get_fresh, address)
+            if response is not None:
+                return response
+        await cls.__token_bucket.acquire()
+        return await loop.run_in_executor(executor, ResponseCache.get, address, cls.__revalidate)
 
     @classmethod
-    def __thread_request(cls, lower_bound, upper_bound, mode, max_num, address):
-        cls.__internet_issue_flag = False
-        cls.__no_resource_flag = False
-        while lower_bound <= upper_bound and not cls.__internet_issue_flag and not cls.__no_resource_flag:
+    def __is_changed(cls, resource_id, content):
+        # fingerprint of the response is compared with the one remembered after the last download
+        if cls.__known is None:
+            return True
+        return cls.__known.get(resource_id) != hashlib.sha1(content).hexdigest()
+
+    @classmethod
+    def __remember(cls, resource_id, content):
+        # fingerprint is remembered only after the response was read, so a malformed one is downloaded again
+        if cls.__known is not None:
+            cls.__known[resource_id] = hashlib.sha1(content).hexdigest()
+
+    @staticmethod
+    def __resource_id(url):
+        # resource urls look like https://pokeapi.co/api/v2/move/15/
+        return int(url.rstrip("/").split("/")[-1])
+
+    @classmethod
+    def __resource_name(cls, url):
+        # move/15 is easier to read in a report than the whole url
+        return url.replace(cls.__api_address, "").rstrip("/")
+
+    @classmethod
+    def __discover(cls, address, revalidate=False):
+        """Streams paginated listing of the api resource and returns urls of every main series resource it lists"""
+        urls = []
+        next_page = f"{address}?limit={cls.__page_size}&offset=0"
+        attempts = 0
+        while next_page is not None:
+            page = ResponseCache.get(next_page, revalidate)
+            if page.status_code == 200:
+                attempts = 0
+                page = page.json()
+                for resource in page["results"]:
+                    if cls.__resource_id(resource["url"]) < cls.__max_main_series_id:
+                        urls.append(resource["url"])
+                next_page = page["next"]
+            else:
+                attempts += 1
+                print(f"Failed listing {next_page} (status {page.status_code})")
+                if attempts >= cls.__max_attempts:
+                    raise TooManyFailedRequestsException([next_page], cls.__max_attempts)
+                sleep(cls.__backoff(attempts))
+        print(f"Discovered {len(urls)} resources under {address}")
+        return urls
+
+    @classmethod
+    async def __requeue(cls, queue, url, delay):
+        try:
+            await asyncio.sleep(delay)
+            queue.put_nowait(url)
+        finally:
+            cls.__retry_tasks.discard(asyncio.current_task())
+
+    @classmethod
+    def __retry_later(cls, queue, url, reason):
+        """Puts failed resource back on the queue after a delay that grows with every failed attempt. Resource is
+        given up on after the maximum number of attempts"""
+        attempts = cls.__attempts.get(url, 0) + 1
+        cls.__attempts[url] = attempts
+        if attempts >= cls.__max_attempts:
+            cls.__failed_resources[url] = reason
+            print(f"Failed {cls.__resource_name(url)} {attempts} times ({reason}). Giving up")
+            return
+
+        delay = cls.__backoff(attempts)
+        print(f"Failed {cls.__resource_name(url)} ({reason}). Retrying in {delay:.1f}s")
+        cls.__retry_tasks.add(asyncio.create_task(cls.__requeue(queue, url, delay)))
+
+    @classmethod
+    async def __worker(cls, queue, results, executor, fetch, *args):
+        while True:
+            url = await queue.get()
             try:
-                request = requests.get(address + str(lower_bound))
-                if request.status_code == 200:
-                    cls.__container_lock.acquire()
-                    cls.__fails_in_a_row = 0
-                    cls.__temporary_container.append(request.json())
-                    print(f"Success {mode} {lower_bound} - {len(cls.__temporary_container) * 100 // max_num}%")
-                    cls.__container_lock.release()
-                else:
-                    cls.__increase_fails()
-                    # if it's not an empty move record try again
-                    if not (mode == "move" and lower_bound in cls.__moves_to_be_skipped):
-                        lower_bound -= 1
-                        print(f"Failed {mode}: {lower_bound} (check if API has this resource)")
-                lower_bound += 1
-
-            except requests.exceptions.RequestException:
-                cls.__internet_issue_flag = True
-
-    @classmethod
-    def __request(cls, mode):
-        if mode == 'type':
-            address_suffix = cls.__api_type
-            number_of_requests = cls.__NUMBER_OF_TYPES
-        elif mode == 'move':
-            address_suffix = cls.__api_move
-            number_of_requests = cls.__NUMBER_OF_MOVES
+                await fetch(executor, queue, results, url, *args)
+            except (ValueError, LookupError, TypeError) as e:
+                # api answered with a body that can't be read (json errors of requests are ValueErrors too), cached
+                # copy of it must not be served to the retry
+                ResponseCache.discard(url)
+                cls.__retry_later(queue, url, f"invalid response ({type(e).__name__})")
+            except requests.exceptions.RequestException as e:
+                cls.__retry_later(queue, url, type(e).__name__)
+            finally:
+                queue.task_done()
+
+    @classmethod
+    async def __download(cls, urls, results, fetch, *args):
+        """Feeds every url from a shared work queue to a pool of workers so that there are always as many requests in
+        flight as the concurrency allows. Every received record is put on the results queue as soon as it arrives"""
+
+        # every worker gets its own keep-alive connection to the api
+        ConnectionPool.set_pool_size(urlsplit(cls.__api_address).hostname, cls.__concurrency)
+
+        cls.__token_bucket = TokenBucket(cls.__requests_per_second)
+        cls.__attempts = {}
+        cls.__retry_tasks = set()
+        cls.__failed_resources = {}
+        cls.__variety_species = {}
+        cls.__species_fingerprints = {}
+        cls.__received = 0
+
+        queue = asyncio.Queue()
+        for url in urls:
+            queue.put_nowait(url)
+
+        try:
+            with ThreadPoolExecutor(max_workers=cls.__concurrency) as executor:
+                workers = [asyncio.create_task(cls.__worker(queue, results, executor, fetch, *args))
+                           for _ in range(cls.__concurrency)]
+                try:
+                    # queue can run empty while failed resources are still waiting for their retry
+                    await queue.join()
+                    while len(cls.__retry_tasks) > 0:
+                        await asyncio.gather(*cls.__retry_tasks)
+                        await queue.join()
+                finally:
+                    # workers have to stop before the executor shuts down, also when the download is cancelled
+                    for task in workers + list(cls.__retry_tasks):
+                        task.cancel()
+                    await asyncio.gather(*workers, *cls.__retry_tasks, return_exceptions=True)
+        finally:
+            results.put_nowait(cls.__end_of_stream)
+
+        ConnectionPool.print_statistics()
+        ResponseCache.print_statistics()
+
+    @classmethod
+    def __check_failures(cls):
+        if len(cls.__failed_resources) > 0:
+            reasons = set(cls.__failed_resources.values())
+            # nothing could be downloaded because of the connection itself
+            if all(not reason.startswith(("status", "invalid response")) for reason in reasons):
+                raise requests.exceptions.ConnectionError()
+            raise TooManyFailedRequestsException(cls.get_failed_resources().keys(), cls.__max_attempts)
+
+    @classmethod
+    async def __fetch_resource(cls, executor, queue, results, url, mode, max_num):
+        request = await cls.__get(executor, url)
+        if request.status_code == 200:
+            cls.__received += 1
+            if cls.__is_changed(cls.__resource_id(url), request.content):
+                results.put_nowait(project(request.json(), projections[mode]))
+                cls.__remember(cls.__resource_id(url), request.content)
+                print(f"Success {mode} {cls.__resource_id(url)} - {cls.__received * 100 // max_num}%")
+        else:
+            cls.__retry_later(queue, url, f"status {request.status_code}")
+
+    @classmethod
+    async def __fetch_pokemon(cls, executor, queue, results, url, skip):
+        """Species and their varieties share one work queue. Downloaded species puts urls of its varieties (alternate
+        forms) on the queue right away and every variety is joined with information about its species once it
+        arrives"""
+        request = await cls.__get(executor, url)
+        if request.status_code != 200:
+            cls.__retry_later(queue, url, f"status {request.status_code}")
+        elif url in cls.__variety_species:
+            species = cls.__variety_species[url]
+            # change of the species (eg. new flavor text) changes every variety of it
+            if cls.__is_changed(cls.__resource_id(url), cls.__species_fingerprints[url] + request.content):
+                results.put_nowait(species + (project(request.json(), projections["pokemon"]),))
+                cls.__remember(cls.__resource_id(url), cls.__species_fingerprints[url] + request.content)
+                print(f"Success Pokemon {species[0]}-{cls.__resource_id(url)}\t")
+        else:
+            species_id = cls.__resource_id(url)
+            species_fingerprint = hashlib.sha1(request.content).digest()
+            request = request.json()
+            mythic = request["is_mythical"]
+            legendary = request["is_legendary"]
+            generation = request["generation"]["name"]
+            flavor = "No description found."
+            flavor_texts = request["flavor_text_entries"]
+            for index in range(len(flavor_texts) - 1, -1, -1):
+                if flavor_texts[index]["language"]["name"] == "en":
+                    flavor = flavor_texts[index]["flavor_text"]
+                    break
+
+            genera = "Pokemon"
+            for genus in request["genera"]:
+                if genus["language"]["name"] == "en":
+                    genera = genus["genus"]
+
+            # Get every alternate form of certain pokemon species. Urls are read before any of them is queued so that
+            # a malformed species doesn't queue some of its varieties twice when it's retried
+            variety_urls = [variety["pokemon"]["url"] for variety in request["varieties"]]
+            variety_ids = [cls.__resource_id(variety_url) for variety_url in variety_urls]
+            for variety_url, variety_id in zip(variety_urls, variety_ids):
+                if variety_id not in skip:
+                    cls.__variety_species[variety_url] = (species_id, legendary, mythic, generation, flavor, genera)
+                    cls.__species_fingerprints[variety_url] = species_fingerprint
+                    queue.put_nowait(variety_url)
+
+    @classmethod
+    async def __async_stream(cls, mode, skip, known, revalidate):
+        """Yields records of the given mode as they arrive. Resources with ids from the skip set aren't downloaded at
+        all. If known dictionary {resource id: fingerprint} is given, only resources that are new or whose response
+        changed are yielded and the dictionary is updated. Revalidate makes every cached response checked with the api
+        no matter how old it is"""
+        if mode == "type":
+            address = cls.__api_address + cls.__api_type
+        elif mode == "move":
+            address = cls.__api_address + cls.__api_move
         elif mode == "ability":
-            address_suffix = cls.__api_ability
-            number_of_requests = cls.__NUMBER_OF_ABILITIES
+            address = cls.__api_address + cls.__api_ability
+        elif mode == "pokemon":
+            address = cls.__api_address + cls.__api_pokemon
         else:
             return
 
-        cls.__temporary_container = []
-        cls.__fails_in_a_row = 0
+        loop = asyncio.get_running_loop()
+        urls = await loop.run_in_executor(None, cls.__discover, address, revalidate)
 
-        with ThreadPoolExecutor(max_workers=2) as tpe:
-            lower_bound1 = 1
-            upper_bound1 = number_of_requests // 2
-            lower_bound2 = upper_bound1 + 1
-            tpe.submit(cls.__thread_request, lower_bound1, upper_bound1, mode, number_of_requests,
-                       cls.__api_address + address_suffix)
-            tpe.submit(cls.__thread_request, lower_bound2, number_of_requests, mode, number_of_requests,
-                       cls.__api_address + address_suffix)
+        # pokemon forms are skipped after their species is downloaded
+        skip = set() if skip is None else skip
+        if mode != "pokemon":
+            urls = [url for url in urls if cls.__resource_id(url) not in skip]
 
-        if cls.__no_resource_flag:
-            raise TooManyFailedRequestsException(cls.__number_of_retries)
-        elif cls.__internet_issue_flag:
-            raise requests.exceptions.RequestException()
+        cls.__known = known
+        cls.__revalidate = revalidate
+        results = asyncio.Queue()
+        if mode == "pokemon":
+            download = asyncio.create_task(cls.__download(urls, results, cls.__fetch_pokemon, skip))
+        else:
+            download = asyncio.create_task(cls.__download(urls, results, cls.__fetch_resource, mode, len(urls)))
 
-        return cls.__temporary_container
+        try:
+            while True:
+                record = await results.get()
+                if record is cls.__end_of_stream:
+                    break
+                yield record
+            await download
+        finally:
+            # consumer stopped early
+            if not download.done():
+                download.cancel()
+        cls.__check_failures()
 
     @classmethod
-    def __thread_request_pokemons(cls, lower_bound, upper_bound):
-        while lower_bound <= upper_bound:
+    def __stream(cls, mode, skip, known, revalidate):
+        """Runs asynchronous stream on its own event loop in a background thread so that records can be processed
+        in the calling thread while the following ones are still being downloaded. Only one download runs at a time.
+        Consumer that stops early (or fails) cancels the download once the stream is closed, a stream that is never
+        closed downloads the rest of the records and lets the next one start"""
+        records = sync_queue.Queue()
+        stopped = threading.Event()
+
+        async def consume():
+            download = asyncio.current_task()
+            # waits for the consumer in a thread of the loop so that it can cancel the download at any moment
+            consumer_stopped = asyncio.get_running_loop().run_in_executor(None, stopped.wait)
+            consumer_stopped.add_done_callback(lambda _: download.cancel())
             try:
-                request = requests.get(cls.__api_address + cls.__api_pokemon + str(lower_bound))
-                if request.status_code == 200:
-                    cls.__container_lock.acquire()
-                    cls.__fails_in_a_row = 0
-                    cls.__container_lock.release()
-                    request = request.json()
-                    mythic = request["is_mythical"]
-                    legendary = request["is_legendary"]
-                    generation = request["generation"]["name"]
-                    flavor = "No description found."
-                    flavor_texts = request["flavor_text_entries"]
-                    for index in range(len(flavor_texts) - 1, -1, -1):
-                        if flavor_texts[index]["language"]["name"] == "en":
-                            flavor = flavor_texts[index]["flavor_text"]
-                            break
-
-                    genera = "Pokemon"
-                    for genus in request["genera"]:
-                        if genus["language"]["name"] == "en":
-                            genera = genus["genus"]
-
-                    j = 0
-                    while j < len(request["varieties"]):  # Get every alternate form of certain pokemon species
-                        inner_request = requests.get(request["varieties"][j]["pokemon"]["url"])
-                        if inner_request.status_code == 200:
-                            cls.__container_lock.acquire()
-                            cls.__fails_in_a_row = 0
-                            cls.__temporary_container.append(
-                                (lower_bound, legendary, mythic, generation, flavor, genera,
-                                 inner_request.json()))
-                            cls.__container_lock.release()
-                            print(f"Success Pokemon {lower_bound}-{j}\t")
-                        else:
-                            cls.__increase_fails()
-                            print(f"Failed Pokemon {lower_bound}-{j}")
-                            j -= 1
-                        j += 1
-                else:
-                    cls.__increase_fails()
-                    print(f"Failed Pokemon Species {lower_bound}")
-                    lower_bound -= 1
-                lower_bound += 1
-            except requests.exceptions.RequestException:
-                cls.__internet_issue_flag = True
+                async for record in cls.__async_stream(mode, skip, known, revalidate):
+                    records.put(record)
+            finally:
+                stopped.set()
+
+        def run():
+            # lock is held by the download and not by the consumer, which might never close the stream
+            with cls.__download_lock:
+                try:
+                    if not stopped.is_set():
+                        asyncio.run(consume())
+                    records.put(cls.__end_of_stream)
+                except BaseException as e:
+                    records.put(e)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        try:
+            while True:
+                record = records.get()
+                if record is cls.__end_of_stream:
+                    break
+                elif isinstance(record, BaseException):
+                    raise record
+                yield record
+        finally:
+            # the next stream can't start while this download still uses the state of the class
+            stopped.set()
+            thread.join()
 
     @classmethod
-    def request_pokemons(cls):
-        """Separate method for requesting Pokemons. Pokemon request are more complex because each Pokemon can have
-        alternate forms"""
+    def async_stream_types(cls, skip=None, known=None, revalidate=False):
+        """Asynchronous iterator yielding json of every type as soon as it's downloaded. Types with ids from the skip
+        set are not downloaded"""
+        return cls.__async_stream("type", skip, known, revalidate)
 
-        cls.__internet_issue_flag = False
-        cls.__no_resource_flag = False
+    @classmethod
+    def async_stream_moves(cls, skip=None, known=None, revalidate=False):
+        """Asynchronous iterator yielding json of every move as soon as it's downloaded. Moves with ids from the skip
+        set are not downloaded"""
+        return cls.__async_stream("move", skip, known, revalidate)
 
-        cls.__temporary_container = []
-        cls.__fails_in_a_row = 0
+    @classmethod
+    def async_stream_abilities(cls, skip=None, known=None, revalidate=False):
+        """Asynchronous iterator yielding json of every ability as soon as it's downloaded. Abilities with ids from the
+        skip set are not downloaded"""
+        return cls.__async_stream("ability", skip, known, revalidate)
 
-        with ThreadPoolExecutor(max_workers=2) as tpe:
-            lower_bound1 = 1
-            upper_bound1 = cls.__NUMBER_OF_POKEMON // 2
-            lower_bound2 = upper_bound1 + 1
-            tpe.submit(cls.__thread_request_pokemons, lower_bound1, upper_bound1)
-            tpe.submit(cls.__thread_request_pokemons, lower_bound2, cls.__NUMBER_OF_POKEMON)
+    @classmethod
+    def async_stream_pokemons(cls, skip=None, known=None, revalidate=False):
+        """Asynchronous iterator yielding tuple (dex number, legendary, mythic, generation, flavor text, genera, json)
+        for every pokemon variety as soon as it's downloaded. Varieties with pokemon ids from the skip set are not
+        downloaded"""
+        return cls.__async_stream("pokemon", skip, known, revalidate)
+
+    @classmethod
+    def stream_types(cls, skip=None, known=None, revalidate=False):
+        return cls.__stream("type", skip, known, revalidate)
 
-        if cls.__no_resource_flag:
-            raise TooManyFailedRequestsException(cls.__number_of_retries)
-        elif cls.__internet_issue_flag:
-            raise requests.exceptions.RequestException()
+    @classmethod
+    def stream_moves(cls, skip=None, known=None, revalidate=False):
+        return cls.__stream("move", skip, known, revalidate)
 
-        return cls.__temporary_container
+    @classmethod
+    def stream_abilities(cls, skip=None, known=None, revalidate=False):
+        return cls.__stream("ability", skip, known, revalidate)
+
+    @classmethod
+    def stream_pokemons(cls, skip=None, known=None, revalidate=False):
+        return cls.__stream("pokemon", skip, known, revalidate)
+
+    @classmethod
+    def request_pokemons(cls):
+        """Separate method for requesting Pokemons. Pokemon request are more complex because each Pokemon can have
+        alternate forms"""
+        return list(cls.stream_pokemons())
 
     @classmethod
     def request_types(cls):
-        return cls.__request("type")
+        return list(cls.stream_types())
 
     @classmethod
     def request_moves(cls):
-        return cls.__request("move")
+        return list(cls.stream_moves())
 
     @classmethod
     def request_abilities(cls):
-        return cls.__request("ability")
+        return list(cls.stream_abilities())
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+from time import time
+from connection_pool import ConnectionPool
+
+
+class CachedResponse:
+    """Response served from the disk cache. Offers the same fields as a response from the connection pool"""
+
+    def __init__(self, entry):
+        self.status_code = 200
+        self.headers = entry["headers"]
+        self.content = entry["content"]
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class ResponseCache:
+    """Raw api responses stored on disk under the name derived from their url. Every entry remembers its ETag and
+    Last-Modified headers so that an expired entry is revalidated with a conditional request and its body is reused
+    if the api answers with 304 Not Modified"""
+
+    __directory = "SavedData"
+    __cache_directory = "ResponseCache"
+    __ttl = 7 * 24 * 60 * 60  # seconds after which an entry has to be revalidated
+    __statistics_lock = threading.Lock()
+    __hits = 0
+    __revalidated = 0
+    __downloaded = 0
+
+    @classmethod
+    def set_ttl(cls, seconds):
+        """Sets how long cached responses are trusted without asking the api"""
+        cls.__ttl = seconds
+
+    @classmethod
+    def __cache_path(cls):
+        file_path = os.path.abspath(cls.__directory)
+        if not os.path.exists(file_path):
+            os.mkdir(file_path)
+        file_path += f"\\{cls.__cache_directory}"
+        if not os.path.exists(file_path):
+            os.mkdir(file_path)
+        return file_path
+
+    @classmethod
+    def __entry_path(cls, url):
+        return cls.__cache_path() + f"\\{hashlib.sha256(url.encode()).hexdigest()}"
+
+    @classmethod
+    def __load_entry(cls, url):
+        try:
+            with open(cls.__entry_path(url), "rb") as file:
+                entry = pickle.load(file)
+            # hashes of two urls could theoretically collide
+            return entry if entry["url"] == url else None
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    @classmethod
+    def __save_entry(cls, entry):
+        try:
+            file_path = cls.__entry_path(entry["url"])
+            # entry is renamed into place so that a crash never leaves a half written entry
+            with open(file_path + ".tmp", "wb") as file:
+                pickle.dump(entry, file)
+            os.replace(file_path + ".tmp", file_path)
+        except OSError:
+            print(f"Failed to cache response from {entry['url']}")
+
+    @classmethod
+    def discard(cls, url):
+        """Removes cached response for the given url, eg. when it turned out to be malformed"""
+        try:
+            os.remove(cls.__entry_path(url))
+        except FileNotFoundError:
+            pass
+        except OSError:
+            print(f"Failed to remove cached response from {url}")
+
+    @classmethod
+    def __count(cls, statistic):
+        cls.__statistics_lock.acquire()
+        if statistic == "hit":
+            cls.__hits += 1
+        elif statistic == "revalidated":
+            cls.__revalidated += 1
+        else:
+            cls.__downloaded += 1
+        cls.__statistics_lock.release()
+
+    @classmethod
+    def __is_fresh(cls, entry):
+        return entry is not None and time() - entry["fetched"] < cls.__ttl
+
+    @classmethod
+    def get_fresh(cls, url):
+        """Returns cached response for the given url if it can be served without asking the api, otherwise None"""
+        entry = cls.__load_entry(url)
+        if cls.__is_fresh(entry):
+            cls.__count("hit")
+            return CachedResponse(entry)
+        return None
+
+    @classmethod
+    def get(cls, url, revalidate=False):
+        """Returns response for the given url. Fresh entries are served without touching the network, expired ones
+        (or every one if revalidate is set) are checked with a conditional request"""
+        entry = cls.__load_entry(url)
+        if not revalidate and cls.__is_fresh(entry):
+            cls.__count("hit")
+            return CachedResponse(entry)
+
+        headers = {}
+        if entry is not None:
+            if entry["etag"] is not None:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"] is not None:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = ConnectionPool.get(url, headers=headers)
+        if response.status_code == 304 and entry is not None:
+            cls.__count("revalidated")
+            entry["fetched"] = time()
+            cls.__save_entry(entry)
+            return CachedResponse(entry)
+        elif response.status_code == 200:
+            cls.__count("downloaded")
+            cls.__save_entry({"url": url,
+                              "etag": response.headers.get("ETag"),
+                              "last_modified": response.headers.get("Last-Modified"),
+                              "fetched": time(),
+                              "headers": dict(response.headers),
+                              "content": response.content})
+        return response
+
+    @classmethod
+    def get_statistics(cls):
+        """Returns tuple (served from cache, revalidated with 304, downloaded)"""
+        return cls.__hits, cls.__revalidated, cls.__downloaded
+
+    @classmethod
+    def print_statistics(cls):
+        hits, revalidated, downloaded = cls.get_statistics()
+        print(f"Responses: {hits} from cache, {revalidated} revalidated, {downloaded} downloaded")
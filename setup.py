@@ -1,4 +1,4 @@
 from distutils.core import setup
 import py2exe
 
-setup(console=['gui.py'], requires=['requests', 'pyglet', 'PIL', 'python-Levenshtein', 'py2exe'])
+setup(console=['gui.py'], requires=['requests', 'pyglet', 'PIL', 'python-Levenshtein', 'numpy', 'py2exe'])
@@ -0,0 +1,21 @@
+import pickle
+
+
+class ReferenceUnpickler(pickle.Unpickler):
+    """Unpickler that turns (kind, id) references into objects that are already loaded. Moves and pokemons were saved
+    with references to types, moves and abilities, which are stored by their names if they had no id"""
+
+    def __init__(self, file, registries):
+        super().__init__(file)
+        # kind -> (objects by id, objects by name)
+        self.__registries = registries
+        self.references = 0
+
+    def persistent_load(self, pid):
+        kind, key = pid
+        by_id, by_name = self.__registries[kind]
+        self.references += 1
+        try:
+            return by_name[key] if isinstance(key, str) else by_id[key]
+        except KeyError:
+            raise pickle.UnpicklingError(f"No {kind} {key} to refer to")
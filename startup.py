@@ -0,0 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from time import perf_counter
+
+
+class StartupLoader:
+    """Runs stages of the startup as soon as every stage they depend on is done, so that independent stages run at the
+    same time in threads. Remembers when every stage started and ended to tell which chain of stages the startup had
+    to wait for"""
+
+    def __init__(self, max_workers=4):
+        self.__max_workers = max_workers
+        self.__stages = {}  # name -> (function, names of stages it depends on)
+        self.__timings = {}  # name -> (start, end) in seconds since the loader started
+
+    def add_stage(self, name, function, depends_on=()):
+        for dependency in depends_on:
+            if dependency not in self.__stages:
+                raise KeyError(f"Stage {name} depends on unknown stage {dependency}")
+        self.__stages[name] = (function, tuple(depends_on))
+
+    def run(self):
+        """Runs every stage. Stages that depend on a failed stage are not started and the first exception raised by a
+        stage is raised again once running stages are done"""
+        start = perf_counter()
+        self.__timings = {}
+        waiting = dict(self.__stages)
+        done = set()
+        error = None
+
+        def timed(name, function):
+            stage_start = perf_counter() - start
+            try:
+                function()
+            finally:
+                self.__timings[name] = (stage_start, perf_counter() - start)
+
+        with ThreadPoolExecutor(max_workers=self.__max_workers) as executor:
+            running = {}  # future -> name of the stage
+            while True:
+                if error is None:
+                    for name, (function, depends_on) in list(waiting.items()):
+                        if all(dependency in done for dependency in depends_on):
+                            running[executor.submit(timed, name, function)] = name
+                            del waiting[name]
+                if len(running) == 0:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    if future.exception() is not None:
+                        error = error or future.exception()
+                    else:
+                        done.add(name)
+        if error is not None:
+            raise error
+
+    def get_timings(self):
+        """Returns dictionary {stage: (start, end)} in seconds since the start of the last run"""
+        return dict(self.__timings)
+
+    def get_critical_path(self):
+        """Returns tuple (names of stages, seconds) of the chain of stages that ended last. Every stage of it waited
+        for the stage before it, so only making them faster makes the startup faster"""
+        if len(self.__timings) == 0:
+            return [], 0.0
+        name = max(self.__timings, key=lambda stage: self.__timings[stage][1])
+        path = [name]
+        while True:
+            dependencies = [dependency for dependency in self.__stages[name][1] if dependency in self.__timings]
+            if len(dependencies) == 0:
+                break
+            # stage could only start after the dependency that ended last
+            name = max(dependencies, key=lambda stage: self.__timings[stage][1])
+            path.append(name)
+        path.reverse()
+        return path, self.__timings[path[-1]][1]
+
+    def print_timings(self):
+        for name, (start, end) in sorted(self.__timings.items(), key=lambda item: item[1]):
+            print(f"{name:<12} {start:8.3f} s - {end:8.3f} s ({end - start:.3f} s)")
+        path, seconds = self.get_critical_path()
+        print(f"Critical path: {' -> '.join(path)} ({seconds:.3f} s)")
@@ -0,0 +1,73 @@
+import numpy as np
+
+
+class StatsTable:
+    """Numeric attributes of pokemons stored column by column. Row i describes the i-th of the pokemons the table was
+    built from, so filters can be answered with array operations instead of loops over objects"""
+
+    stat_names = ["hp", "attack", "defense", "special-attack", "special-defense", "speed"]
+    columns = stat_names + ["total", "height", "weight", "dex_number", "generation"]
+    generations = {"I": 1, "II": 2, "III": 3, "IV": 4, "V": 5, "VI": 6, "VII": 7, "VIII": 8, "IX": 9}
+
+    def __init__(self, stats, heights, weights, dex_numbers, generations):
+        """Every argument holds values of one attribute for every pokemon, stats as lists of (name, value)"""
+        self.__columns = {column: np.zeros(len(stats), dtype=np.int32) for column in self.columns}
+        for row, pokemon_stats in enumerate(stats):
+            for name, value in pokemon_stats:
+                if name in self.__columns:
+                    self.__columns[name][row] = value
+        self.__columns["height"][:] = heights
+        self.__columns["weight"][:] = weights
+        self.__columns["dex_number"][:] = dex_numbers
+        self.__columns["generation"][:] = [self.generations.get(generation, 0) for generation in generations]
+        self.__columns["total"] = sum(self.__columns[name] for name in self.stat_names).astype(np.int32)
+
+        # base stats are compared after being scaled by their spread so that no single stat dominates distances
+        stats = np.stack([self.__columns[name] for name in self.stat_names], axis=1).astype(np.float64)
+        self.__mean = stats.mean(axis=0) if len(stats) > 0 else np.zeros(len(self.stat_names))
+        self.__spread = stats.std(axis=0) if len(stats) > 0 else np.ones(len(self.stat_names))
+        self.__spread[self.__spread == 0] = 1
+        self.__stat_vectors = (stats - self.__mean) / self.__spread
+
+    def __len__(self):
+        return len(self.__columns["total"])
+
+    def get_column(self, column):
+        return self.__columns[column]
+
+    def get_stat_vectors(self):
+        """Returns base stats of every row normalized to zero mean and unit spread"""
+        return self.__stat_vectors
+
+    def get_stat_vector(self, pokemon):
+        """Returns base stats of any pokemon normalized the same way as the rows"""
+        stats = dict(pokemon.stats)
+        return (np.array([stats.get(name, 0) for name in self.stat_names], dtype=np.float64) - self.__mean) / \
+            self.__spread
+
+    def filter(self, ranges, rows=None):
+        """Returns bitset of rows whose values fall into every {column: (lowest, highest)} range. Either end of a
+        range can be None. Only rows set in the rows bitset are considered if it is given"""
+        found = np.ones(len(self), dtype=bool) if rows is None else rows.copy()
+        for column, (lowest, highest) in ranges.items():
+            values = self.__columns[column]
+            if lowest is not None:
+                found &= values >= lowest
+            if highest is not None:
+                found &= values <= highest
+        return found
+
+    def sort(self, rows, column, descending=True, limit=None):
+        """Returns indexes of rows set in the bitset sorted by the column (ties by dex number). If limit is given
+        only the first limit rows are selected before sorting"""
+        indexes = np.flatnonzero(rows)
+        values = self.__columns[column][indexes]
+        if descending:
+            values = -values.astype(np.int64)
+        if limit is not None and limit < len(indexes):
+            # top k are selected in linear time, only they get sorted
+            threshold = np.partition(values, limit - 1)[limit - 1]
+            selected = values <= threshold
+            indexes, values = indexes[selected], values[selected]
+        order = np.lexsort((indexes, self.__columns["dex_number"][indexes], values))
+        return indexes[order][:limit]
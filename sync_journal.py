@@ -0,0 +1,78 @@
+import os
+import pickle
+
+
+class SyncJournal:
+    """Append-only log of objects built during a download. Objects are written in batches and every batch is flushed
+    to disk before the next one starts, so an interrupted download loses at most one batch and can be resumed from the
+    resources that are already in the journal. Every object is kept with the fingerprint of its response, so that
+    resources that aren't downloaded again when resuming still get into the SyncManifest"""
+
+    __directory = "SavedData"
+    __batch_size = 50
+
+    def __init__(self, name):
+        file_path = os.path.abspath(self.__directory)
+        if not os.path.exists(file_path):
+            os.mkdir(file_path)
+        self.__file_path = file_path + f"\\{name}.journal"
+        self.__batch = []
+        self.__completed = set()
+        self.__fingerprints = {}  # resource id -> fingerprint of its response
+
+    def load(self):
+        """Returns objects saved by the previous interrupted download and remembers ids of their resources"""
+        objects = []
+        self.__completed = set()
+        self.__fingerprints = {}
+        try:
+            with open(self.__file_path, "rb") as file:
+                while True:
+                    batch = pickle.load(file)
+                    # journals written before fingerprints were kept hold only (resource id, object)
+                    for resource_id, obj, *fingerprint in batch:
+                        self.__completed.add(resource_id)
+                        if len(fingerprint) > 0 and fingerprint[0] is not None:
+                            self.__fingerprints[resource_id] = fingerprint[0]
+                        objects.append(obj)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            # a batch that was being written during a crash is incomplete and gets downloaded again
+            pass
+        if len(objects) > 0:
+            print(f"Resuming download from {os.path.basename(self.__file_path)} ({len(objects)} already done)")
+        return objects
+
+    def completed_ids(self):
+        return set(self.__completed)
+
+    def fingerprints(self):
+        """Returns dictionary {resource id: fingerprint} of resources in the journal"""
+        return dict(self.__fingerprints)
+
+    def add(self, resource_id, obj, fingerprint=None):
+        self.__batch.append((resource_id, obj, fingerprint))
+        self.__completed.add(resource_id)
+        if fingerprint is not None:
+            self.__fingerprints[resource_id] = fingerprint
+        if len(self.__batch) >= self.__batch_size:
+            self.flush()
+
+    def flush(self):
+        if len(self.__batch) == 0:
+            return
+        try:
+            with open(self.__file_path, "ab") as file:
+                pickle.dump(self.__batch, file)
+                file.flush()
+                os.fsync(file.fileno())
+            self.__batch = []
+        except OSError:
+            print("Failed to save download progress")
+
+    def remove(self):
+        """Journal is not needed once the whole download is saved"""
+        self.__batch = []
+        self.__completed = set()
+        self.__fingerprints = {}
+        if os.path.exists(self.__file_path):
+            os.remove(self.__file_path)
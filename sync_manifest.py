@@ -0,0 +1,53 @@
+import os
+import pickle
+import threading
+
+
+class SyncManifest:
+    """Remembers which api resources are stored locally together with fingerprints of their responses. It lets an
+    update download and rebuild only resources that were added or changed since the last download"""
+
+    __directory = "SavedData"
+    __file_name = "manifest.data"
+    __manifest = None  # mode -> {resource id -> fingerprint}
+    __lock = threading.RLock()  # stores can be prepared at the same time by a StartupLoader
+
+    @classmethod
+    def __load(cls):
+        with cls.__lock:
+            if cls.__manifest is None:
+                try:
+                    file_path = os.path.abspath(cls.__directory)
+                    file_path += f"\\{cls.__file_name}"
+                    with open(file_path, "rb") as file:
+                        cls.__manifest = pickle.load(file)
+                except (OSError, EOFError, pickle.UnpicklingError):
+                    cls.__manifest = {}
+            return cls.__manifest
+
+    @classmethod
+    def get(cls, mode):
+        """Returns dictionary {resource id: fingerprint} of stored resources. Changes made to it are saved with save()"""
+        return cls.__load().setdefault(mode, {})
+
+    @classmethod
+    def reset(cls, mode):
+        """Forgets every stored resource of the given mode. Used before the whole store is downloaded again"""
+        with cls.__lock:
+            cls.__load()[mode] = {}
+            return cls.__manifest[mode]
+
+    @classmethod
+    def save(cls):
+        try:
+            file_path = os.path.abspath(cls.__directory)
+            if not os.path.exists(file_path):
+                os.mkdir(file_path)
+            file_path += f"\\{cls.__file_name}"
+            with cls.__lock:
+                # another store can be adding fingerprints while it is being downloaded, so its copy is saved
+                manifest = {mode: dict(known) for mode, known in cls.__load().items()}
+                with open(file_path, "wb") as file:
+                    pickle.dump(manifest, file)
+        except OSError:
+            raise
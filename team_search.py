@@ -0,0 +1,170 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from time import time
+
+import numpy as np
+
+from pokemon import Types, proper_word
+
+
+def coverage_score(defence_points, offence_points):
+    """Scores points of a team the way weakness mode buckets them: every great type is worth 2, good 1, bad -1 and
+    terrible -2, both for defence and offence. Works on whole arrays of teams (points are in the last axis)"""
+    score = 0
+    for points in (defence_points, offence_points):
+        score = score + 2 * (points >= 2).sum(axis=-1) + ((0 < points) & (points < 2)).sum(axis=-1) \
+            - ((-2 < points) & (points < 0)).sum(axis=-1) - 2 * (points <= -2).sum(axis=-1)
+    return score
+
+
+def search_teams(starts, tables, base, slots, constraints, top, deadline, max_width=8192):
+    """Searches teams whose first free slot holds one of the starting typings. Lives outside of TeamSearch so that
+    it can run in worker processes. Every level keeps a beam of the best partial teams, the beam is widened until the
+    search is exhaustive, max_width is reached or the deadline passes. Returns list of (score, typing indices) and
+    what cut the search short - None if it was exhaustive, "beam" or "time" otherwise"""
+    defence_table, offence_table = tables
+    base_defence, base_offence = base
+    must_resist, no_double_weakness = constraints
+    # the most points a single typing can add to every column, used to bound what unfilled slots can still achieve
+    best_defence = defence_table.max(axis=0)
+    best_offence = offence_table.max(axis=0)
+    found = {}
+    width = top
+    while True:
+        exhaustive = True
+        threshold = sorted(found.values())[-top] if len(found) >= top else None
+        teams = np.array(starts, dtype=np.int16).reshape(-1, 1)
+        # sums of the partial teams are carried along the beam so a child only adds its own typing
+        defence = base_defence + defence_table[teams[:, 0]]
+        offence = base_offence + offence_table[teams[:, 0]]
+        for depth in range(1, slots + 1):
+            remaining = slots - depth
+            # teams are kept in non decreasing order of typings so that every team is visited once
+            keep = np.ones(len(teams), dtype=bool)
+            for column in must_resist:
+                keep &= defence[:, column] + remaining * best_defence[column] > 0
+            for column in no_double_weakness:
+                keep &= defence[:, column] + remaining * best_defence[column] > -2
+            if threshold is not None:
+                bound = coverage_score(defence + remaining * best_defence, offence + remaining * best_offence)
+                keep &= bound > threshold
+            teams, defence, offence = teams[keep], defence[keep], offence[keep]
+            if remaining == 0 or len(teams) == 0:
+                break
+
+            children = np.arange(len(defence_table))[None, :] >= teams[:, -1:]
+            parents, typings = np.nonzero(children)
+            child_defence = defence[parents] + defence_table[typings]
+            child_offence = offence[parents] + offence_table[typings]
+            if len(parents) > width:
+                exhaustive = False
+                best = np.argpartition(-coverage_score(child_defence, child_offence), width)[:width]
+                parents, typings = parents[best], typings[best]
+                child_defence, child_offence = child_defence[best], child_offence[best]
+            teams = np.concatenate([teams[parents], typings[:, None].astype(np.int16)], axis=1)
+            defence, offence = child_defence, child_offence
+            if time() > deadline and len(found) > 0:
+                exhaustive = False
+                break
+
+        if len(teams) > 0 and teams.shape[1] == slots:
+            for team, score in zip(teams, coverage_score(defence, offence)):
+                found[tuple(team.tolist())] = int(score)
+        if exhaustive:
+            stopped_by = None
+            break
+        if time() > deadline:
+            stopped_by = "time"
+            break
+        if width >= max_width:
+            stopped_by = "beam"
+            break
+        width *= 4
+    best_teams = sorted(found.items(), key=lambda item: (-item[1], item[0]))[:top]
+    return [(score, team) for team, score in best_teams], stopped_by
+
+
+class TeamSearch:
+    """Finds combinations of typings that cover the most types in both defence and offence. Every team is scored with
+    the same points as calculate_defence and calculate_offence and the search is pruned by the best score unfilled
+    slots could still reach"""
+
+    __typings = []  # (primary, secondary) pairs, secondary is None for single typed pokemons
+    __defence_table = None
+    __offence_table = None
+    __type_names = []
+
+    @classmethod
+    def __prepare(cls):
+        type_names = Types.get_type_names()
+        if cls.__type_names == type_names:
+            return
+        cls.__type_names = type_names
+        cls.__typings = [(name, None) for name in type_names] + list(combinations(type_names, 2))
+        counts = np.array([Types.get_type_counts([typ for typ in typing if typ is not None])
+                           for typing in cls.__typings])
+        cls.__defence_table = Types.get_defence_points(counts).astype(np.int16)
+        cls.__offence_table = Types.get_offence_points(counts).astype(np.int16)
+
+    @classmethod
+    def get_typings(cls):
+        cls.__prepare()
+        return list(cls.__typings)
+
+    @classmethod
+    def __typing_index(cls, typing):
+        primary, secondary = typing if isinstance(typing, tuple) else (typing, None)
+        names = sorted([proper_word(primary)] + ([proper_word(secondary)] if secondary else []),
+                       key=cls.__type_names.index)
+        if len(names) == 2 and names[0] == names[1]:
+            names.pop()
+        return cls.__typings.index((names[0], names[1] if len(names) > 1 else None))
+
+    @classmethod
+    def find_teams(cls, size=6, locked=(), must_resist=(), no_double_weakness=(), top=10, time_budget=10,
+                   processes=None):
+        """Returns up to top best teams as list of (score, [typings]) filling size slots. Locked typings (names or
+        (primary, secondary) pairs) are always part of the team, the team has to resist every type from must_resist
+        and can't be doubly weak (terrible in defence) to any type from no_double_weakness. It's a beam search: small
+        teams are searched exhaustively, for large ones (like 6 free slots) the beam stops widening at its maximum
+        width so the best teams found are not guaranteed to be the best possible. Search also stops widening once
+        time_budget seconds run out and returns the best teams found so far"""
+        cls.__prepare()
+        deadline = time() + time_budget
+        locked = [cls.__typing_index(typing) for typing in locked]
+        slots = size - len(locked)
+        if slots < 0:
+            raise ValueError(f"Team of {size} can't have {len(locked)} locked slots")
+        base = (cls.__defence_table[locked].sum(axis=0), cls.__offence_table[locked].sum(axis=0))
+        positions = {name: position for position, name in enumerate(cls.__type_names)}
+        constraints = ([positions[proper_word(typ)] for typ in must_resist],
+                       [positions[proper_word(typ)] for typ in no_double_weakness])
+        tables = (cls.__defence_table, cls.__offence_table)
+
+        if slots == 0:
+            results = [cls.__search_locked(tables, base, constraints)]
+        else:
+            processes = processes or os.cpu_count() or 1
+            starts = [list(range(len(cls.__typings)))[worker::processes] for worker in range(processes)]
+            if processes == 1:
+                results = [search_teams(starts[0], tables, base, slots, constraints, top, deadline)]
+            else:
+                with ProcessPoolExecutor(max_workers=processes) as executor:
+                    results = list(executor.map(search_teams, starts, [tables] * processes, [base] * processes,
+                                                [slots] * processes, [constraints] * processes, [top] * processes,
+                                                [deadline] * processes))
+
+        teams = sorted((team for found, _ in results for team in found), key=lambda team: (-team[0], team[1]))[:top]
+        if any(stopped_by == "time" for _, stopped_by in results):
+            print("Team search ran out of time, best teams found so far are returned")
+        return [(score, [cls.__typings[index] for index in sorted(locked + list(team))]) for score, team in teams]
+
+    @staticmethod
+    def __search_locked(tables, base, constraints):
+        defence, offence = base
+        must_resist, no_double_weakness = constraints
+        if all(defence[column] > 0 for column in must_resist) and \
+                all(defence[column] > -2 for column in no_double_weakness):
+            return [(int(coverage_score(defence, offence)), ())], None
+        return [], None
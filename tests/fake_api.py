@@ -0,0 +1,91 @@
+import json
+import re
+import threading
+
+api = "https://pokeapi.co/api/v2/"
+type_names = ["normal", "fire", "water", "grass"]
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FakeApi:
+    """Answers requests of ConnectionPool.get with listings of 'counts' resources. Bodies of urls in 'bodies' are
+    served as they are instead of generated ones and urls in 'statuses' are answered only with the given status.
+    While 'outage' is positive every request of a resource is answered with 503 and lowers it"""
+
+    def __init__(self, counts):
+        self.counts = counts
+        self.bodies = {}
+        self.statuses = {}
+        self.outage = 0
+        self.requested = []
+        self.__lock = threading.Lock()
+
+    def __call__(self, url, headers=None):
+        with self.__lock:
+            self.requested.append(url)
+            if self.outage > 0 and "?" not in url:
+                self.outage -= 1
+                return FakeResponse(503)
+        if url in self.statuses:
+            return FakeResponse(self.statuses[url])
+        if url in self.bodies:
+            return FakeResponse(200, self.bodies[url])
+        listing = re.match(api + r"([a-z-]+)/\?limit=(\d+)&offset=(\d+)$", url)
+        if listing is not None:
+            kind, limit, offset = listing.group(1), int(listing.group(2)), int(listing.group(3))
+            ids = range(offset + 1, min(offset + limit, self.counts[kind]) + 1)
+            next_page = f"{api}{kind}/?limit={limit}&offset={offset + limit}" \
+                if offset + limit < self.counts[kind] else None
+            page = {"next": next_page, "results": [{"url": f"{api}{kind}/{i}/"} for i in ids]}
+            return FakeResponse(200, json.dumps(page).encode())
+        kind, resource_id = re.match(api + r"([a-z-]+)/(\d+)/$", url).groups()
+        return FakeResponse(200, json.dumps(self.resource(kind, int(resource_id))).encode())
+
+    @staticmethod
+    def resource(kind, resource_id):
+        """Returns json of a resource. Pokemon n learns quick-move-1 and quick-move-n, has strong-ability-1 and hidden
+        strong-ability-2 if n is even, its types are normal and fire or water by parity of n and its stats grow
+        with n"""
+        if kind == "type":
+            relations = ["double_damage_from", "double_damage_to", "half_damage_from", "half_damage_to",
+                         "no_damage_from", "no_damage_to"]
+            return {"id": resource_id, "name": type_names[resource_id - 1],
+                    "damage_relations": {relation: [] for relation in relations}}
+        if kind == "move":
+            return {"id": resource_id, "name": f"quick-move-{resource_id}", "accuracy": 100,
+                    "damage_class": {"name": "status"},
+                    "flavor_text_entries": [{"flavor_text": f"Move number {resource_id}", "language": {"name": "en"}}],
+                    "effect_chance": None, "power": None, "pp": 10, "priority": 0, "type": {"name": "normal"}}
+        if kind == "ability":
+            return {"id": resource_id, "name": f"strong-ability-{resource_id}",
+                    "effect_entries": [{"effect": f"Effect {resource_id}", "language": {"name": "en"}}],
+                    "flavor_text_entries": []}
+        if kind == "pokemon-species":
+            element = "fire" if resource_id % 2 == 1 else "water"
+            return {"id": resource_id, "is_mythical": False, "is_legendary": resource_id == 1,
+                    "generation": {"name": "generation-i" if resource_id <= 2 else "generation-ii"},
+                    "flavor_text_entries": [{"flavor_text": f"It likes {element}", "language": {"name": "en"}}],
+                    "genera": [{"genus": "Test Pokemon", "language": {"name": "en"}}],
+                    "varieties": [{"pokemon": {"url": f"{api}pokemon/{resource_id}/"}}]}
+        if kind == "pokemon":
+            stats = ["hp", "attack", "defense", "special-attack", "special-defense", "speed"]
+            element = "fire" if resource_id % 2 == 1 else "water"
+            return {"id": resource_id, "name": f"pokemon-{resource_id}", "height": 7, "weight": 69,
+                    "sprites": {"front_default": None},
+                    "stats": [{"base_stat": 10 * resource_id + index, "stat": {"name": stat}}
+                              for index, stat in enumerate(stats)],
+                    "abilities": [{"ability": {"name": "strong-ability-1"}, "is_hidden": False}] +
+                                 ([{"ability": {"name": "strong-ability-2"}, "is_hidden": True}]
+                                  if resource_id % 2 == 0 else []),
+                    "moves": [{"move": {"name": f"quick-move-{move_id}"}} for move_id in sorted({1, resource_id})],
+                    "types": [{"type": {"name": "normal"}}, {"type": {"name": element}}]}
+        raise KeyError(kind)
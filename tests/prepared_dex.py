@@ -0,0 +1,61 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from connection_pool import ConnectionPool
+from fake_api import FakeApi
+from pokemon import Abilities, Moves, Pokemons, Types
+from requester import Requester
+from sync_manifest import SyncManifest
+
+
+def quietly(function, *arguments):
+    """Returns what the function returned and printed"""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        result = function(*arguments)
+    return result, output.getvalue()
+
+
+class PreparedDexTest(unittest.TestCase):
+    """Every store is downloaded from a FakeApi into a temporary directory once for the whole test case. Registries
+    that are only ever appended to are replaced for the time of the test case"""
+
+    counts = {"type": 4, "move": 8, "ability": 3, "pokemon-species": 6}
+
+    @classmethod
+    def setUpClass(cls):
+        # saved data is written relative to the working directory
+        cls.__cwd = os.getcwd()
+        cls.__directory = tempfile.TemporaryDirectory()
+        os.chdir(cls.__directory.name)
+        cls.api = FakeApi(cls.counts)
+        cls.__patches = [mock.patch.object(ConnectionPool, "get", cls.api)]
+        for registry, attributes in ((Types, ["types", "types_by_name", "types_by_id"]),
+                                     (Abilities, ["abilities", "abilities_by_name", "abilities_by_id"])):
+            for attribute in attributes:
+                value = getattr(registry, f"_{registry.__name__}__{attribute}")
+                cls.__patches.append(mock.patch.object(registry, f"_{registry.__name__}__{attribute}", type(value)()))
+        for patch in cls.__patches:
+            patch.start()
+        SyncManifest._SyncManifest__manifest = None
+        Requester.set_rate_limit(1000)
+        quietly(cls.prepare)
+
+    @classmethod
+    def prepare(cls):
+        Types.prepare_types()
+        Abilities.prepare_abilities()
+        Moves.prepare_moves()
+        Pokemons.prepare_pokemons()
+
+    @classmethod
+    def tearDownClass(cls):
+        for patch in cls.__patches:
+            patch.stop()
+        SyncManifest._SyncManifest__manifest = None
+        os.chdir(cls.__cwd)
+        cls.__directory.cleanup()
@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+
+from columnar_file import ColumnarFile, LazyRecords, is_columnar_file, write_columns
+from pokemon import Moves, Pokemons
+from prepared_dex import PreparedDexTest, quietly
+
+
+class Named:
+    def __init__(self, name):
+        self.name = name
+
+
+class Record:
+    schema = [("number", "int", "number"), ("flag", "bool", "flag"), ("text", "str", "text"),
+              ("data", "json", "data"), ("kind", "ref", "kind"), ("kinds", "refs", "kinds"),
+              ("flagged", "flagged refs", "flagged"), ("pairs", "pairs", "pairs")]
+
+    def __init__(self, number):
+        self.number = number
+        self.flag = number % 2 == 0
+        self.text = f"record {number} ż"
+        self.data = {"list": [number, None]} if number != 2 else None
+        self.kind = Named(f"kind {number % 2}")
+        self.kinds = [Named("a"), Named(f"kind {number}")]
+        self.flagged = [(Named("a"), number == 1)]
+        self.pairs = [("hp", number), ("speed", -number)]
+
+
+class ColumnarFileTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.__directory.name, "records.data")
+        self.records = [Record(number) for number in range(4)]
+        self.records[3].text = None
+        write_columns(self.file_path, self.records, Record.schema)
+        self.store = ColumnarFile(self.file_path, {column: Named for column in ("kind", "kinds", "flagged")})
+
+    def tearDown(self):
+        self.store.close()
+        self.__directory.cleanup()
+
+    def test_values_read_one_by_one_and_by_column(self):
+        self.assertTrue(is_columnar_file(self.file_path))
+        self.assertEqual(len(self.store), 4)
+        for column in ("number", "flag", "text", "data", "pairs"):
+            expected = [getattr(record, column) for record in self.records]
+            self.assertEqual([self.store.get(column, row) for row in range(4)], expected)
+            self.assertEqual(self.store.column(column), expected)
+        self.assertEqual([self.store.get("kind", row).name for row in range(4)], ["kind 0", "kind 1"] * 2)
+        self.assertEqual([[kind.name for kind in kinds] for kinds in self.store.column("kinds")],
+                         [["a", f"kind {number}"] for number in range(4)])
+        self.assertEqual([(kind.name, flag) for kind, flag in self.store.get("flagged", 1)], [("a", True)])
+
+    def test_referred_objects_are_resolved_once(self):
+        self.assertIs(self.store.get("kind", 0), self.store.get("kind", 2))
+        self.assertIs(self.store.get("kinds", 0)[0], self.store.column("kinds")[3][0])
+
+    def test_lazy_records_are_built_when_accessed(self):
+        records = LazyRecords(Record, store=self.store)
+        self.assertEqual(records.value(2, "number"), 2)
+        self.assertEqual(records.column("text"), ["record 0 ż", "record 1 ż", "record 2 ż", None])
+        record = records[1]
+        self.assertIs(records[1], record)
+        self.assertEqual((record.number, record.flag, record.pairs), (1, False, [("hp", 1), ("speed", -1)]))
+
+        records.append(Record(7))
+        records.detach()
+        self.assertEqual([record.number for record in records], [0, 1, 2, 3, 7])
+
+    def test_file_is_not_columnar(self):
+        with open(self.file_path + ".pickle", "wb") as file:
+            file.write(b"\x80\x04")
+        self.assertFalse(is_columnar_file(self.file_path + ".pickle"))
+        self.assertFalse(is_columnar_file(self.file_path + ".missing"))
+
+
+class SavedDexTest(PreparedDexTest):
+    def test_stores_read_back_from_columnar_files(self):
+        moves = [(move.id, move.name, move.type) for move in Moves.get_moves()]
+        pokemons = [(pokemon.name, [typ.name for typ in pokemon.types], [move.name for move in pokemon.moves],
+                     pokemon.stats) for pokemon in Pokemons.get_pokemons()]
+
+        for file_name in ("moves.data", "pokemons.data"):
+            self.assertTrue(is_columnar_file(os.path.abspath("SavedData") + f"\\{file_name}"))
+        quietly(self.prepare)
+
+        self.assertEqual([(move.id, move.name, move.type) for move in Moves.get_moves()], moves)
+        self.assertEqual([(pokemon.name, [typ.name for typ in pokemon.types], [move.name for move in pokemon.moves],
+                           pokemon.stats) for pokemon in Pokemons.get_pokemons()], pokemons)
+        # objects refer to the loaded ones instead of their copies
+        self.assertIs(Pokemons.get_pokemon("pokemon 1").moves[0], Moves.get_move("quick-move-1"))
+
+    def test_details_are_read_when_pokemon_is_shown(self):
+        quietly(self.prepare)
+
+        pokemon = Pokemons.get_filtered_pokemons("mon 3")[0]
+        self.assertIsNotNone(pokemon._Pokemon__details)
+        self.assertEqual([typ.name for typ in pokemon.types], ["Normal", "Fire"])
+        self.assertIsNotNone(pokemon._Pokemon__details)
+
+        self.assertEqual(pokemon.description, "It likes fire")
+        self.assertIsNone(pokemon._Pokemon__details)
+        self.assertEqual([move.name for move in pokemon.moves], ["Quick Move 1", "Quick Move 3"])
+        self.assertEqual(pokemon.stats[0], ("hp", 30))
+
+
+if __name__ == "__main__":
+    unittest.main()
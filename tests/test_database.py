@@ -0,0 +1,53 @@
+import unittest
+
+from database import Database
+from pokemon import Abilities, Moves, Pokemons, Types, save_database
+from prepared_dex import PreparedDexTest, quietly
+
+
+def described(pokemons):
+    return [(pokemon.name, [typ.name for typ in pokemon.types], [move.name for move in pokemon.moves],
+             [(ability.name, hidden) for ability, hidden in pokemon.abilities], pokemon.stats, pokemon.description)
+            for pokemon in pokemons]
+
+
+class DatabaseTest(PreparedDexTest):
+    queries = [
+        lambda: described(Pokemons.get_filtered_pokemons()),
+        lambda: described(Pokemons.get_filtered_pokemons("mon 3")),
+        lambda: described(Pokemons.get_filtered_pokemons(primary="Normal", secondary="Water", order=1)),
+        lambda: described(Pokemons.get_filtered_pokemons(generation="II")),
+        lambda: described(Pokemons.get_pokemons_by_stats({"hp": (30, None)}, sort_by="attack", limit=2)),
+        lambda: described(Pokemons.get_pokemons_by_stats({"speed": (None, 45)}, secondary="Fire")),
+        lambda: described(Moves.get_learners("Quick Move 1")),
+        lambda: [(name, hidden) for name, hidden in Abilities.get_holders("strong-ability-2")],
+        lambda: described([Pokemons.get_pokemon("pokemon 4"), Pokemons.get_pokemon_by_id(5)]),
+        lambda: [(move.name, move.type, move.accuracy) for move in Moves.get_moves()],
+        lambda: [(typ.name, typ.id) for typ in Types.get_types()],
+        lambda: [(ability.name, ability.description) for ability in Abilities.get_abilities()],
+    ]
+
+    def tearDown(self):
+        Database.close()
+
+    def test_database_answers_like_loaded_stores(self):
+        loaded = [query() for query in self.queries]
+        quietly(save_database)
+        Database.open()
+
+        self.assertTrue(Database.is_open())
+        for query, expected in zip(self.queries, loaded):
+            self.assertEqual(query(), expected)
+        # every row is built once, so objects refer to each other like loaded ones do
+        self.assertIs(Pokemons.get_pokemon("pokemon 1").moves[0], Moves.get_move("quick-move-1"))
+
+    def test_closed_database_gives_loaded_stores_back(self):
+        quietly(save_database)
+        Database.open()
+        Database.close()
+
+        self.assertIs(Pokemons.get_pokemon("pokemon 1"), Pokemons.get_pokemons()[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+
+from pokemon import Abilities, Moves, Pokemons, Types
+from pokemon_exceptions import NoGivenMoveException, NoGivenPokemonException
+from prepared_dex import PreparedDexTest
+
+
+def names(pokemons):
+    return [pokemon.name for pokemon in pokemons]
+
+
+class IndexTest(PreparedDexTest):
+    def test_objects_by_id(self):
+        self.assertEqual(Types.get_type_by_id(2).name, "Fire")
+        self.assertEqual(Moves.get_move_by_id(5).name, "Quick Move 5")
+        self.assertEqual(Abilities.get_ability_by_id(3).name, "Strong Ability 3")
+        self.assertEqual(Pokemons.get_pokemon_by_id(4).name, "Pokemon 4")
+
+    def test_objects_by_name(self):
+        self.assertIs(Moves.get_move("quick-move-5"), Moves.get_move_by_id(5))
+        self.assertIs(Moves.find_move("Quick Move 5"), Moves.get_move_by_id(5))
+        self.assertIs(Pokemons.get_pokemon("pokemon 4"), Pokemons.get_pokemon_by_id(4))
+
+    def test_unknown_objects(self):
+        with self.assertRaises(NoGivenMoveException):
+            Moves.get_move_by_id(100)
+        with self.assertRaises(NoGivenPokemonException):
+            Pokemons.get_pokemon("missingno")
+
+
+class NameSearchTest(PreparedDexTest):
+    def test_names_containing_text(self):
+        self.assertEqual(names(Pokemons.get_filtered_pokemons("mon 3")), ["Pokemon 3"])
+        self.assertEqual(len(Pokemons.get_filtered_pokemons("poke")), 6)
+
+    def test_names_with_typos(self):
+        self.assertIn("Pokemon 4", names(Pokemons.get_filtered_pokemons("pokenom 4")))
+        self.assertEqual(Pokemons.get_filtered_pokemons("charizard"), [])
+
+
+class FilterTest(PreparedDexTest):
+    def test_filter_by_types_and_generation(self):
+        self.assertEqual(names(Pokemons.get_filtered_pokemons(primary="Normal", secondary="Fire")),
+                         ["Pokemon 1", "Pokemon 3", "Pokemon 5"])
+        self.assertEqual(names(Pokemons.get_filtered_pokemons(secondary="Water", generation="II")),
+                         ["Pokemon 4", "Pokemon 6"])
+        self.assertEqual(Pokemons.get_filtered_pokemons(primary="Grass"), [])
+
+    def test_filters_combine_with_name(self):
+        self.assertEqual(names(Pokemons.get_filtered_pokemons("mon 2", secondary="Water")), ["Pokemon 2"])
+        self.assertEqual(Pokemons.get_filtered_pokemons("mon 2", secondary="Fire", generation="I"), [])
+
+
+class TextSearchTest(PreparedDexTest):
+    def test_search_descriptions(self):
+        self.assertEqual(sorted(names(Pokemons.search_pokemons("fire"))), ["Pokemon 1", "Pokemon 3", "Pokemon 5"])
+        self.assertEqual(sorted(names(Pokemons.search_pokemons("wat*"))), ["Pokemon 2", "Pokemon 4", "Pokemon 6"])
+        self.assertEqual(Pokemons.search_pokemons("grass"), [])
+
+    def test_search_phrases(self):
+        self.assertEqual(names(Moves.search_moves('"number 3"')), ["Quick Move 3"])
+        self.assertEqual(names(Abilities.search_abilities('effect "2"')), ["Strong Ability 2"])
+        self.assertEqual(len(Moves.search_moves("number", limit=3)), 3)
+
+
+class StatsTest(PreparedDexTest):
+    # base stats of pokemon n are 10 * n + 0, 1, ... in the order hp, attack, ..., speed
+
+    def test_ranges_sort_and_limit(self):
+        found = Pokemons.get_pokemons_by_stats({"hp": (30, None)}, sort_by="attack", limit=2)
+        self.assertEqual(names(found), ["Pokemon 6", "Pokemon 5"])
+        found = Pokemons.get_pokemons_by_stats({"speed": (None, 35), "total": (100, None)}, descending=False)
+        self.assertEqual(names(found), ["Pokemon 2", "Pokemon 3"])
+
+    def test_ranges_combine_with_filters(self):
+        found = Pokemons.get_pokemons_by_stats({"hp": (20, None)}, sort_by="hp", secondary="Fire")
+        self.assertEqual(names(found), ["Pokemon 5", "Pokemon 3"])
+
+    def test_similar_stats(self):
+        similar = Pokemons.get_similar_pokemons("pokemon 3", k=2)
+        self.assertEqual(sorted(names(pokemon for pokemon, _ in similar)), ["Pokemon 2", "Pokemon 4"])
+        self.assertAlmostEqual(similar[0][1], similar[1][1])
+        within = Pokemons.get_pokemons_within("pokemon 1", similar[0][1] * 1.5)
+        self.assertEqual(names(pokemon for pokemon, _ in within), ["Pokemon 2"])
+
+
+class LearnersTest(PreparedDexTest):
+    def test_learners_by_displayed_and_api_name(self):
+        for name in ("Quick Move 4", "quick-move-4"):
+            self.assertEqual([pokemon.name for pokemon in Moves.get_learners(name)], ["Pokemon 4"])
+        self.assertEqual(len(Moves.get_learners(Moves.get_move("quick-move-1"))), 6)
+
+    def test_holders_by_displayed_and_api_name(self):
+        for name in ("Strong Ability 2", "strong-ability-2"):
+            self.assertEqual([(pokemon.name, hidden) for pokemon, hidden in Abilities.get_holders(name)],
+                             [("Pokemon 2", True), ("Pokemon 4", True), ("Pokemon 6", True)])
+        self.assertEqual(Abilities.get_holders("Strong Ability 2", hidden=False), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from connection_pool import ConnectionPool
+from fake_api import FakeApi, api
+from requester import Requester, TooManyFailedRequestsException
+from response_cache import ResponseCache
+
+
+class RequesterTest(unittest.TestCase):
+    def setUp(self):
+        # saved data is written relative to the working directory
+        self.__cwd = os.getcwd()
+        self.__directory = tempfile.TemporaryDirectory()
+        os.chdir(self.__directory.name)
+        self.api = FakeApi({"move": 6, "pokemon-species": 3})
+        self.__patch = mock.patch.object(ConnectionPool, "get", self.api)
+        self.__patch.start()
+        Requester.set_rate_limit(1000)
+        Requester.set_max_attempts(2)
+
+    def tearDown(self):
+        self.__patch.stop()
+        Requester.set_max_attempts(6)
+        Requester.set_concurrency(32)
+        os.chdir(self.__cwd)
+        self.__directory.cleanup()
+
+    def download(self, stream=Requester.stream_moves):
+        """Returns tuple (ids of downloaded records, raised exception). Fails instead of waiting if the download
+        hangs"""
+        outcome = {"records": [], "error": None}
+
+        def run():
+            try:
+                for record in stream():
+                    outcome["records"].append(record)
+            except Exception as e:
+                outcome["error"] = e
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(timeout=30)
+        self.assertFalse(thread.is_alive(), "download didn't finish")
+        return sorted(record[-1]["id"] if isinstance(record, tuple) else record["id"]
+                      for record in outcome["records"]), outcome["error"]
+
+    def test_malformed_response_is_reported(self):
+        self.api.bodies[f"{api}move/3/"] = b"{not json"
+        self.api.bodies[f"{api}move/4/"] = b"42"
+
+        moves, error = self.download()
+
+        self.assertEqual(moves, [1, 2, 5, 6])
+        self.assertIsInstance(error, TooManyFailedRequestsException)
+        self.assertEqual(Requester.get_failed_resources(), {"move/3": "invalid response (JSONDecodeError)",
+                                                            "move/4": "invalid response (TypeError)"})
+        self.assertEqual(self.api.requested.count(f"{api}move/3/"), 2)
+
+    def test_every_worker_survives_malformed_responses(self):
+        Requester.set_concurrency(2)
+        for resource_id in (1, 2, 3):
+            self.api.bodies[f"{api}move/{resource_id}/"] = b"{not json"
+
+        moves, error = self.download()
+
+        self.assertEqual(moves, [4, 5, 6])
+        self.assertIsInstance(error, TooManyFailedRequestsException)
+        self.assertEqual(set(Requester.get_failed_resources()), {"move/1", "move/2", "move/3"})
+
+    def test_malformed_species_is_reported(self):
+        self.api.bodies[f"{api}pokemon-species/2/"] = b'{"id": 2}'
+
+        pokemons, error = self.download(Requester.stream_pokemons)
+
+        self.assertEqual(pokemons, [1, 3])
+        self.assertIsInstance(error, TooManyFailedRequestsException)
+        self.assertEqual(Requester.get_failed_resources(), {"pokemon-species/2": "invalid response (KeyError)"})
+
+    def test_malformed_response_is_not_served_from_cache(self):
+        self.api.bodies[f"{api}move/3/"] = b"{not json"
+        original_get = ResponseCache.get
+
+        def get(url, revalidate=False):
+            response = original_get(url, revalidate)
+            # api answers correctly once it's asked again
+            self.api.bodies.pop(url, None)
+            return response
+
+        with mock.patch.object(ResponseCache, "get", get):
+            moves, error = self.download()
+
+        self.assertEqual(moves, [1, 2, 3, 4, 5, 6])
+        self.assertIsNone(error)
+        self.assertEqual(Requester.get_failed_resources(), {})
+        self.assertEqual(self.api.requested.count(f"{api}move/3/"), 2)
+
+    def test_fresh_response_is_read_once_outside_of_event_loop(self):
+        self.download()
+        load_entry = ResponseCache._ResponseCache__load_entry
+        loads = []
+
+        def counted_load_entry(url):
+            loads.append((url, threading.current_thread().name))
+            return load_entry(url)
+
+        with mock.patch.object(ResponseCache, "_ResponseCache__load_entry", counted_load_entry):
+            moves, error = self.download()
+
+        self.assertEqual(moves, [1, 2, 3, 4, 5, 6])
+        resource_loads = [(url, thread) for url, thread in loads if "?" not in url]
+        self.assertEqual(sorted(url for url, _ in resource_loads), [f"{api}move/{i}/" for i in range(1, 7)])
+        # the event loop runs in a thread started by Requester, blocking calls go to its executor
+        self.assertTrue(all(thread.startswith("ThreadPoolExecutor") for _, thread in resource_loads))
+        self.assertEqual(len([url for url in self.api.requested if "?" not in url]), 6)
+
+    def test_concurrent_failures_during_outage_are_retried(self):
+        # the first request of every resource fails at once, far more failures than there are attempts per resource
+        self.api.counts["move"] = 20
+        self.api.outage = 20
+
+        moves, error = self.download()
+
+        self.assertEqual(moves, list(range(1, 21)))
+        self.assertIsNone(error)
+        self.assertEqual(Requester.get_failed_resources(), {})
+
+    def test_stream_that_wasnt_closed_doesnt_block_next_one(self):
+        def consume_and_fail(records):
+            for _ in records:
+                raise KeyError("damage_relations")
+
+        # stream stays referenced (like by a traceback kept by StartupLoader), so it's never closed
+        records = Requester.stream_moves()
+        with self.assertRaises(KeyError):
+            consume_and_fail(records)
+
+        moves, error = self.download()
+
+        self.assertEqual(moves, [1, 2, 3, 4, 5, 6])
+        self.assertIsNone(error)
+        records.close()
+
+    def test_stream_closed_early_stops_its_download(self):
+        self.api.counts["move"] = 200
+        records = Requester.stream_moves()
+        next(records)
+        records.close()
+        downloaded = len(self.api.requested)
+
+        moves, error = self.download()
+
+        self.assertEqual(len(moves), 200)
+        self.assertIsNone(error)
+        self.assertLess(downloaded, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import threading
+import unittest
+from time import sleep
+from unittest import mock
+
+from connection_pool import ConnectionPool
+from fake_api import FakeApi
+from prepared_dex import quietly
+from requester import Requester
+from startup import StartupLoader
+
+
+class StartupLoaderTest(unittest.TestCase):
+    def run_loader(self, loader):
+        """Returns exception raised by the loader. Fails instead of waiting if the loader hangs"""
+        outcome = {"error": None}
+
+        def run():
+            try:
+                quietly(loader.run)
+            except Exception as e:
+                outcome["error"] = e
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(timeout=30)
+        self.assertFalse(thread.is_alive(), "loader didn't finish")
+        return outcome["error"]
+
+    def test_stages_run_after_their_dependencies(self):
+        finished = []
+        loader = StartupLoader()
+        loader.add_stage("types", lambda: (sleep(0.05), finished.append("types")))
+        loader.add_stage("abilities", lambda: finished.append("abilities"))
+        loader.add_stage("moves", lambda: finished.append("moves"), depends_on=["types"])
+        loader.add_stage("pokemons", lambda: finished.append("pokemons"), depends_on=["types", "moves", "abilities"])
+
+        self.assertIsNone(self.run_loader(loader))
+
+        self.assertLess(finished.index("types"), finished.index("moves"))
+        self.assertEqual(finished[-1], "pokemons")
+        timings = loader.get_timings()
+        self.assertGreaterEqual(timings["moves"][0], timings["types"][1])
+        path, seconds = loader.get_critical_path()
+        self.assertEqual(path, ["types", "moves", "pokemons"])
+        self.assertEqual(seconds, timings["pokemons"][1])
+
+    def test_unknown_dependency(self):
+        loader = StartupLoader()
+        with self.assertRaises(KeyError):
+            loader.add_stage("moves", lambda: None, depends_on=["types"])
+
+    def test_failed_stage_is_raised_and_its_dependents_are_skipped(self):
+        finished = []
+        loader = StartupLoader()
+        loader.add_stage("types", lambda: {}["damage_relations"])
+        loader.add_stage("abilities", lambda: finished.append("abilities"))
+        loader.add_stage("moves", lambda: finished.append("moves"), depends_on=["types"])
+
+        self.assertIsInstance(self.run_loader(loader), KeyError)
+
+        self.assertEqual(finished, ["abilities"])
+        self.assertNotIn("moves", loader.get_timings())
+
+
+class StartupDownloadTest(StartupLoaderTest):
+    def setUp(self):
+        # saved data is written relative to the working directory
+        self.__cwd = os.getcwd()
+        self.__directory = tempfile.TemporaryDirectory()
+        os.chdir(self.__directory.name)
+        self.__patch = mock.patch.object(ConnectionPool, "get", FakeApi({"type": 3, "ability": 3}))
+        self.__patch.start()
+        Requester.set_rate_limit(1000)
+
+    def tearDown(self):
+        self.__patch.stop()
+        os.chdir(self.__cwd)
+        self.__directory.cleanup()
+
+    def test_stage_failing_while_downloading_doesnt_block_others(self):
+        downloading = threading.Event()
+        abilities = []
+
+        def create_types(json_types):
+            for _ in json_types:
+                downloading.set()
+                # like Type() given a response without damage_relations
+                raise KeyError("damage_relations")
+
+        def create_abilities():
+            downloading.wait()
+            abilities.extend(Requester.stream_abilities())
+
+        loader = StartupLoader()
+        # stream stays referenced by the frame of create_types kept in the traceback of the failed stage
+        loader.add_stage("types", lambda: create_types(Requester.stream_types()))
+        loader.add_stage("abilities", create_abilities)
+
+        self.assertIsInstance(self.run_loader(loader), KeyError)
+        self.assertEqual(len(abilities), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
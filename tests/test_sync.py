@@ -0,0 +1,119 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from connection_pool import ConnectionPool
+from fake_api import FakeApi, api
+from pokemon import Abilities, Moves, Types
+from requester import Requester, TooManyFailedRequestsException
+from sync_journal import SyncJournal
+from sync_manifest import SyncManifest
+
+
+class ResumedSyncTest(unittest.TestCase):
+    def setUp(self):
+        # saved data is written relative to the working directory
+        self.__cwd = os.getcwd()
+        self.__directory = tempfile.TemporaryDirectory()
+        os.chdir(self.__directory.name)
+        self.api = FakeApi({"type": 1, "move": 8, "ability": 3})
+        self.__patches = [mock.patch.object(ConnectionPool, "get", self.api),
+                          mock.patch.object(SyncJournal, "_SyncJournal__batch_size", 2)]
+        for patch in self.__patches:
+            patch.start()
+        Requester.set_rate_limit(1000)
+        self.restart()
+
+    def tearDown(self):
+        for patch in self.__patches:
+            patch.stop()
+        Requester.set_max_attempts(6)
+        self.restart()
+        os.chdir(self.__cwd)
+        self.__directory.cleanup()
+
+    @staticmethod
+    def restart():
+        # manifest is read from the disk again like after the program is started
+        SyncManifest._SyncManifest__manifest = None
+
+    @staticmethod
+    def quietly(function):
+        """Returns what the function printed"""
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            function()
+        return output.getvalue()
+
+    def test_update_after_resumed_sync_downloads_only_changes(self):
+        self.quietly(Types.prepare_types)
+
+        # download gets interrupted after some moves were journaled
+        Requester.set_max_attempts(1)
+        for resource_id in (7, 8):
+            self.api.statuses[f"{api}move/{resource_id}/"] = 500
+        with self.assertRaises(TooManyFailedRequestsException):
+            self.quietly(Moves.prepare_moves)
+        self.restart()
+
+        self.api.statuses = {}
+        self.api.requested = []
+        self.quietly(Moves.prepare_moves)
+        self.assertEqual(sorted(url for url in self.api.requested if "?" not in url),
+                         [f"{api}move/7/", f"{api}move/8/"])
+        self.assertEqual(set(SyncManifest.get("move")), set(range(1, 9)))
+
+        self.restart()
+        changed = FakeApi.resource("move", 2)
+        changed["accuracy"] = 90
+        self.api.bodies[f"{api}move/2/"] = json.dumps(changed).encode()
+        output = self.quietly(Moves.update_moves)
+
+        self.assertIn("Moves updated (1 new or changed)", output)
+        self.assertEqual(Moves.get_move("quick-move-2").accuracy, 90)
+
+    def test_moves_built_before_failed_download_are_journaled(self):
+        self.quietly(Types.prepare_types)
+        Requester.set_max_attempts(1)
+        self.api.statuses[f"{api}move/8/"] = 500
+
+        # every move fits into a single batch which is never full
+        with mock.patch.object(SyncJournal, "_SyncJournal__batch_size", 50):
+            with self.assertRaises(TooManyFailedRequestsException):
+                self.quietly(Moves.prepare_moves)
+
+        journaled = self.quietly_load(SyncJournal("moves"))
+        self.assertEqual(sorted(move.id for move in journaled), [1, 2, 3, 4, 5, 6, 7])
+
+    def test_update_keeps_descriptions_of_abilities_with_the_same_name(self):
+        for resource_id in (1, 2):
+            ability = FakeApi.resource("ability", resource_id)
+            ability["name"] = "twin"
+            self.api.bodies[f"{api}ability/{resource_id}/"] = json.dumps(ability).encode()
+        self.quietly(Abilities.prepare_abilities)
+        # abilities arrive in any order, the description of the stored one comes first
+        stored_id = 1 if Abilities.get_ability("twin").description == "Effect 1/\nEffect 2" else 2
+        self.restart()
+
+        # only the ability that was stored changes, the one merged into it isn't downloaded again
+        ability = json.loads(self.api.bodies[f"{api}ability/{stored_id}/"])
+        ability["effect_entries"][0]["effect"] = "Changed effect"
+        self.api.bodies[f"{api}ability/{stored_id}/"] = json.dumps(ability).encode()
+        self.quietly(Abilities.update_abilities)
+
+        merged_id = 3 - stored_id
+        self.assertEqual(Abilities.get_ability("twin").description, f"Changed effect/\nEffect {merged_id}")
+        self.assertEqual(len(Abilities.get_abilities()), 2)
+
+    def quietly_load(self, journal):
+        objects = []
+        self.quietly(lambda: objects.extend(journal.load()))
+        return objects
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import contextlib
+import io
+import unittest
+from itertools import combinations_with_replacement
+from time import time
+from unittest import mock
+
+import numpy as np
+
+from pokemon import Types
+from team_search import TeamSearch, coverage_score, search_teams
+
+relations = {
+    "fire": {"double_damage_to": ["grass", "ice"], "half_damage_to": ["water", "fire"],
+             "double_damage_from": ["water"], "half_damage_from": ["grass", "ice", "fire"]},
+    "water": {"double_damage_to": ["fire"], "half_damage_to": ["grass", "water"],
+              "double_damage_from": ["grass"], "half_damage_from": ["fire", "ice", "water"]},
+    "grass": {"double_damage_to": ["water"], "half_damage_to": ["fire", "grass"],
+              "double_damage_from": ["fire", "ice"], "half_damage_from": ["water", "grass"]},
+    "ice": {"double_damage_to": ["grass"], "half_damage_to": ["fire", "water", "ice"],
+            "double_damage_from": ["fire"], "half_damage_from": ["ice"]},
+    "ghost": {"double_damage_to": ["ghost"], "no_damage_to": ["normal"],
+              "double_damage_from": ["ghost"], "no_damage_from": ["normal"]},
+    "normal": {"no_damage_to": ["ghost"], "no_damage_from": ["ghost"]}
+}
+
+
+def type_json(type_id, name):
+    kinds = ["double_damage_from", "double_damage_to", "half_damage_from", "half_damage_to", "no_damage_from",
+             "no_damage_to"]
+    return {"id": type_id, "name": name,
+            "damage_relations": {kind: [{"name": other} for other in relations[name].get(kind, [])] for kind in kinds}}
+
+
+class TeamSearchTest(unittest.TestCase):
+    def setUp(self):
+        # types are kept in the class, every test starts with only the types above
+        self.__patches = [mock.patch.object(Types, "_Types__types", []),
+                          mock.patch.object(Types, "_Types__types_by_name", {}),
+                          mock.patch.object(Types, "_Types__types_by_id", {})]
+        for patch in self.__patches:
+            patch.start()
+        Types.create_types([type_json(type_id, name) for type_id, name in enumerate(relations, 1)])
+
+    def tearDown(self):
+        for patch in self.__patches:
+            patch.stop()
+
+    @staticmethod
+    def find_teams(**arguments):
+        """Returns tuple (found teams, what the search printed)"""
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            teams = TeamSearch.find_teams(processes=1, **arguments)
+        return teams, output.getvalue()
+
+    @staticmethod
+    def best_score(size):
+        scores = []
+        for team in combinations_with_replacement(TeamSearch.get_typings(), size):
+            counts = Types.get_type_counts([typ for typing in team for typ in typing if typ is not None])
+            scores.append(int(coverage_score(Types.get_defence_points(counts), Types.get_offence_points(counts))))
+        return max(scores)
+
+    def test_finds_best_team(self):
+        teams, output = self.find_teams(size=3, top=5, time_budget=60)
+
+        self.assertEqual(teams[0][0], self.best_score(3))
+        self.assertEqual([score for score, _ in teams], sorted((score for score, _ in teams), reverse=True))
+        self.assertTrue(all(len(team) == 3 for _, team in teams))
+        self.assertEqual(output, "")
+
+    def test_locked_typings_are_part_of_every_team(self):
+        teams, _ = self.find_teams(size=2, locked=[("water", "ice")], time_budget=60)
+
+        self.assertTrue(all(("Water", "Ice") in team or ("Ice", "Water") in team for _, team in teams))
+
+    def test_reports_search_stopped_by_time(self):
+        _, output = self.find_teams(size=6, time_budget=0)
+
+        self.assertIn("ran out of time", output)
+
+    def test_beam_limit_is_not_reported_as_time(self):
+        typings = TeamSearch.get_typings()
+        tables = tuple(np.array([points(Types.get_type_counts([typ for typ in typing if typ is not None]))
+                                 for typing in typings], dtype=np.int16)
+                       for points in (Types.get_defence_points, Types.get_offence_points))
+        base = (np.zeros(len(relations), dtype=np.int16), np.zeros(len(relations), dtype=np.int16))
+
+        found, stopped_by = search_teams(list(range(len(typings))), tables, base, 6, ([], []), 1, time() + 60,
+                                         max_width=4)
+        self.assertEqual(stopped_by, "beam")
+        self.assertEqual(len(found), 1)
+
+        _, stopped_by = search_teams(list(range(len(typings))), tables, base, 2, ([], []), 1, time() + 60)
+        self.assertIsNone(stopped_by)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import pickle
+import re
+from bisect import bisect_left
+from math import log
+
+
+class TextIndex:
+    """Inverted index of descriptions ranked with BM25. Every word remembers its positions in a document so that
+    quoted phrases can be matched. Query words ending with * match every word that starts with them"""
+
+    __k1 = 1.2
+    __b = 0.75
+    __word = re.compile(r"[a-z0-9]+")
+    __query_part = re.compile(r'"([^"]*)"|(\S+)')
+
+    def __init__(self):
+        self.__postings = {}  # word -> {document: [positions of the word]}
+        self.__lengths = {}  # document -> number of words
+        self.__vocabulary = None  # sorted words used by prefix queries, built again after documents are added
+
+    @classmethod
+    def __words(cls, text):
+        # plural and third person 's' is dropped so that 'raise' finds 'raises'
+        return [word[:-1] if len(word) > 3 and word[-1] == "s" and word[-2] not in "su" else word
+                for word in cls.__word.findall(text.lower())]
+
+    def add(self, document, text):
+        words = self.__words(text)
+        self.__lengths[document] = len(words)
+        for position, word in enumerate(words):
+            self.__postings.setdefault(word, {}).setdefault(document, []).append(position)
+        self.__vocabulary = None
+
+    def get_statistics(self):
+        """Returns tuple (documents, distinct words, postings, size of the pickled index in bytes)"""
+        postings = sum(len(documents) for documents in self.__postings.values())
+        size = len(pickle.dumps((self.__postings, self.__lengths)))
+        return len(self.__lengths), len(self.__postings), postings, size
+
+    def __starting_with(self, prefix):
+        if self.__vocabulary is None:
+            self.__vocabulary = sorted(self.__postings)
+        words = []
+        index = bisect_left(self.__vocabulary, prefix)
+        while index < len(self.__vocabulary) and self.__vocabulary[index].startswith(prefix):
+            words.append(self.__vocabulary[index])
+            index += 1
+        return words
+
+    def __matches_phrase(self, document, phrase):
+        starts = self.__postings[phrase[0]][document]
+        return any(all(start + offset in self.__postings[word][document] for offset, word in enumerate(phrase))
+                   for start in starts)
+
+    def search(self, query, limit=None):
+        """Returns list of (document, score) sorted from the best match. Documents have to contain every quoted
+        phrase, other words only make a document rank higher"""
+        words = []
+        phrases = []
+        for phrase, part in self.__query_part.findall(query):
+            if phrase:
+                phrase = self.__words(phrase)
+                if len(phrase) > 0:
+                    phrases.append(phrase)
+                    words.extend(phrase)
+                continue
+            part_words = self.__words(part)
+            if part.endswith("*") and len(part_words) > 0:
+                words.extend(part_words[:-1])
+                words.extend(self.__starting_with(part_words[-1]))
+            else:
+                words.extend(part_words)
+
+        words = [word for word in set(words) if word in self.__postings]
+        candidates = None
+        for phrase in phrases:
+            if any(word not in self.__postings for word in phrase):
+                return []
+            if candidates is None:
+                candidates = set(min((self.__postings[word] for word in phrase), key=len))
+            candidates = {document for document in candidates if
+                          all(document in self.__postings[word] for word in phrase) and
+                          self.__matches_phrase(document, phrase)}
+        if candidates is None:
+            candidates = set()
+            for word in words:
+                candidates.update(self.__postings[word])
+
+        documents = len(self.__lengths)
+        average_length = sum(self.__lengths.values()) / documents if documents > 0 else 0
+        scores = dict.fromkeys(candidates, 0.0)
+        for word in words:
+            postings = self.__postings[word]
+            idf = log(1 + (documents - len(postings) + 0.5) / (len(postings) + 0.5))
+            # whichever of the two is smaller is walked through
+            if len(scores) < len(postings):
+                matches = ((document, postings[document]) for document in scores if document in postings)
+            else:
+                matches = ((document, positions) for document, positions in postings.items() if document in scores)
+            for document, positions in matches:
+                normalization = 1 - self.__b + self.__b * self.__lengths[document] / average_length
+                frequency = len(positions)
+                scores[document] += idf * frequency * (self.__k1 + 1) / (frequency + self.__k1 * normalization)
+        ranking = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranking if limit is None else ranking[:limit]